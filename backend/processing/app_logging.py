@@ -0,0 +1,195 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from cache import content_hash
+from serialization import dumps
+
+CONTENT_MODES = ("truncate", "hash", "full", "none")
+
+# set by configure_logging
+_settings = {
+    "sample_rate": 1.0,
+    "content_mode": "truncate",
+    "content_max_chars": 80
+}
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["DroppingQueueHandler"] = None
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when its bounded queue is full instead of blocking"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JSONFormatter(logging.Formatter):
+    """one JSON object per line: ts, level, logger, msg and the record's fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return dumps(entry).decode("utf-8")
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class StructuredLogger:
+    """logging.Logger wrapper taking structured fields as keyword arguments
+
+    Records below WARNING are sampled at the configured rate, and nothing is
+    formatted when the level is disabled or the record is sampled out.
+    """
+
+    def __init__(self, name: str):
+        self.logger = logging.getLogger(name)
+
+    def log(self, level: int, msg: str, exc_info=None, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        sample_rate = _settings["sample_rate"]
+        if level < logging.WARNING and sample_rate < 1.0 and random.random() >= sample_rate:
+            return
+        self.logger.log(level, msg, exc_info=exc_info, extra={"fields": fields})
+
+    def debug(self, msg: str, **fields):
+        self.log(logging.DEBUG, msg, **fields)
+
+    def info(self, msg: str, **fields):
+        self.log(logging.INFO, msg, **fields)
+
+    def warning(self, msg: str, **fields):
+        self.log(logging.WARNING, msg, **fields)
+
+    def error(self, msg: str, **fields):
+        self.log(logging.ERROR, msg, **fields)
+
+    def is_enabled(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
+
+
+class LogThrottle:
+    """lets one record through per interval seconds for events that repeat under load
+
+    ready() returns how many events were suppressed since the last record
+    that went through, or None while the interval has not passed
+    """
+
+    def __init__(self, interval: float = 10.0):
+        self.interval = interval
+        self.suppressed = 0
+        self._last = float("-inf")
+        self._lock = threading.Lock()
+
+    def ready(self) -> Optional[int]:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last < self.interval:
+                self.suppressed += 1
+                return None
+            self._last = now
+            suppressed, self.suppressed = self.suppressed, 0
+            return suppressed
+
+
+def get_logger(name: str) -> StructuredLogger:
+    return StructuredLogger(f"clipsmart.{name}")
+
+
+def content_fields(text: Optional[str], prefix: str = "content") -> Dict[str, Any]:
+    """log-safe description of clipboard content per LOG_CONTENT
+
+    truncate (default) keeps the first content_max_chars characters, hash
+    keeps a sha256 prefix, full keeps everything and none only the length
+    """
+    if text is None:
+        return {f"{prefix}_length": 0}
+    fields = {f"{prefix}_length": len(text)}
+    mode = _settings["content_mode"]
+    if mode == "truncate":
+        limit = _settings["content_max_chars"]
+        fields[prefix] = text[:limit] + "..." if len(text) > limit else text
+    elif mode == "hash":
+        fields[f"{prefix}_sha256"] = content_hash(text)[:16]
+    elif mode == "full":
+        fields[prefix] = text
+    return fields
+
+
+def configure_logging(level: str = "INFO", fmt: str = "json", sample_rate: float = 1.0,
+                      content_mode: str = "truncate", content_max_chars: int = 80,
+                      max_queue: int = 10000, stream=None) -> DroppingQueueHandler:
+    """route clipsmart.* loggers through a bounded queue to a background writer thread
+
+    Request handlers only enqueue records; formatting and stream I/O happen
+    on the QueueListener thread. Records that arrive while the queue is full
+    are dropped and counted.
+    """
+    global _listener, _queue_handler
+
+    if content_mode not in CONTENT_MODES:
+        raise ValueError(f"content_mode must be one of {', '.join(CONTENT_MODES)}")
+    _settings.update(sample_rate=sample_rate, content_mode=content_mode, content_max_chars=content_max_chars)
+
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JSONFormatter() if fmt == "json" else TextFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=max_queue))
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, output, respect_handler_level=False)
+    _listener.start()
+
+    root = logging.getLogger("clipsmart")
+    root.handlers[:] = [_queue_handler]
+    root.setLevel(level.upper())
+    root.propagate = False
+    return _queue_handler
+
+
+def logging_stats() -> Dict[str, Any]:
+    return {
+        "queued": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+        "sample_rate": _settings["sample_rate"],
+        "content_mode": _settings["content_mode"]
+    }
+
+
+def shutdown_logging():
+    """flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,194 @@
+"""Classifier micro-benchmarks with a stored baseline
+
+Run from backend/processing:
+
+    python -m benchmarks.bench_classify                    # compare with baseline.json
+    python -m benchmarks.bench_classify --update-baseline  # record a new baseline
+
+The run fails (exit status 1) when any case's median per-call time exceeds
+the calibrated baseline median by more than --tolerance, even after one
+re-measurement. Only classification code is imported, so no Gemini, S3 or
+Mongo access is needed.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from classification.classify import checkAddress, checkDate, checkLink, checkMath, classifier
+
+from .corpus import build_corpora
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+FUNCTIONS = {
+    'checkLink': checkLink,
+    'checkDate': checkDate,
+    'checkMath': checkMath,
+    'checkAddress': checkAddress,
+    'classify': classifier.classify,
+}
+
+
+CALIBRATION_PATTERN = re.compile(r'\b\w+ing\b')
+CALIBRATION_TEXT = 'the quick brown fox jumping over the lazy sleeping dog ' * 20
+
+
+def calibrate(rounds: int = 3) -> float:
+    """microseconds for a fixed regex/sort workload, best of rounds
+
+    Timed next to every case so comparisons can be scaled by how fast the
+    machine happens to be running at that moment.
+    """
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(50):
+            CALIBRATION_PATTERN.findall(CALIBRATION_TEXT)
+            sorted(CALIBRATION_TEXT.split())
+        best = min(best, time.perf_counter() - started)
+    return round(best * 1e6, 2)
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def time_function(func: Callable, texts: List[str], repeat: int) -> Dict[str, float]:
+    """per-call timings in microseconds over repeat passes of texts
+
+    p50_us is the lowest per-pass median, which is far less sensitive to
+    scheduler noise than the median of all samples; the tail percentiles
+    use every sample.
+    """
+    for text in texts[:10]:
+        func(text)
+
+    perf_counter = time.perf_counter
+    samples = []
+    pass_medians = []
+    started = perf_counter()
+    for _ in range(repeat):
+        pass_samples = []
+        for text in texts:
+            call_started = perf_counter()
+            func(text)
+            pass_samples.append((perf_counter() - call_started) * 1e6)
+        pass_medians.append(_percentile(sorted(pass_samples), 0.50))
+        samples.extend(pass_samples)
+    elapsed = perf_counter() - started
+
+    samples.sort()
+    return {
+        'calls': len(samples),
+        'ops_per_sec': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        'p50_us': round(min(pass_medians), 2),
+        'p95_us': round(_percentile(samples, 0.95), 2),
+        'p99_us': round(_percentile(samples, 0.99), 2),
+        'max_us': round(samples[-1], 2),
+        'calibration_us': calibrate(),
+    }
+
+
+def run(size: int, repeat: int, seed: int, cases: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for corpus_name, texts in build_corpora(seed=seed, size=size).items():
+        for function_name, func in FUNCTIONS.items():
+            case = f"{function_name}/{corpus_name}"
+            if cases is None or case in cases:
+                results[case] = time_function(func, texts, repeat)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float, min_delta_us: float) -> List[str]:
+    """names of cases whose median regressed past the tolerance
+
+    The baseline median is scaled by the ratio of the calibration timings
+    taken alongside each case, so a uniformly slower machine does not fail.
+    """
+    regressions = []
+    for case, stats in results.items():
+        reference = baseline.get(case)
+        if reference is None:
+            continue
+        expected = reference['p50_us']
+        if reference.get('calibration_us') and stats.get('calibration_us'):
+            expected *= stats['calibration_us'] / reference['calibration_us']
+        limit = max(expected * (1 + tolerance), expected + min_delta_us)
+        if stats['p50_us'] > limit:
+            regressions.append(case)
+    return regressions
+
+
+def print_table(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], regressions: List[str]):
+    print(f"{'case':<28} {'ops/s':>12} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} {'base p50':>9}")
+    for case, stats in results.items():
+        reference = baseline.get(case, {}).get('p50_us')
+        marker = '  REGRESSION' if case in regressions else ''
+        print(f"{case:<28} {stats['ops_per_sec']:>12,.0f} {stats['p50_us']:>9.2f} {stats['p95_us']:>9.2f} "
+              f"{stats['p99_us']:>9.2f} {reference if reference is not None else '-':>9}{marker}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the clipboard classifiers")
+    parser.add_argument('--size', type=int, default=50, help="texts per corpus")
+    parser.add_argument('--repeat', type=int, default=7, help="passes over each corpus")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=0.50,
+                        help="allowed fractional slowdown of the median before failing")
+    parser.add_argument('--min-delta-us', type=float, default=2.0,
+                        help="ignore slowdowns smaller than this many microseconds")
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.size, args.repeat, args.seed)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'size': args.size,
+                'repeat': args.repeat,
+                'seed': args.seed,
+                'results': results
+            }, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('results', {})
+
+    regressions = [] if args.update_baseline else compare(results, baseline, args.tolerance, args.min_delta_us)
+    if regressions:
+        # re-time suspects once so a single noisy pass does not fail the run
+        rerun = run(args.size, args.repeat, args.seed, cases=regressions)
+        for case, stats in rerun.items():
+            if stats['p50_us'] < results[case]['p50_us']:
+                results[case] = stats
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_us)
+
+    if args.json:
+        print(json.dumps({'results': results, 'regressions': regressions}, indent=2))
+    else:
+        print_table(results, baseline, regressions)
+
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than baseline by more than {args.tolerance:.0%}: "
+              + ', '.join(regressions), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import random
+from typing import Dict, List
+
+WORDS = [
+    'the', 'meeting', 'notes', 'please', 'review', 'project', 'update', 'team',
+    'quick', 'brown', 'fox', 'jumps', 'over', 'lazy', 'dog', 'clipboard',
+    'copy', 'paste', 'email', 'thanks', 'regards', 'deadline', 'draft', 'report'
+]
+STREETS = ['Main', 'Oak', 'Maple', 'Pine', 'Cedar', 'Elm', 'Washington', 'Lake']
+STREET_TYPES = ['St', 'Street', 'Ave', 'Avenue', 'Rd', 'Blvd', 'Lane', 'Dr']
+CITIES = [('Springfield', 'IL'), ('Portland', 'OR'), ('Austin', 'TX'), ('Boston', 'MA')]
+MONTHS = ['January', 'March', 'May', 'July', 'September', 'November', 'Jan', 'Mar', 'Oct']
+DOMAINS = ['example.com', 'github.com', 'docs.python.org', 'news.ycombinator.com']
+
+
+def _sentence(rng: random.Random, length: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(length)).capitalize() + '.'
+
+
+def short_clips(rng: random.Random, count: int) -> List[str]:
+    return [' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 6))) for _ in range(count)]
+
+
+def long_pastes(rng: random.Random, count: int) -> List[str]:
+    return [' '.join(_sentence(rng, rng.randint(8, 20)) for _ in range(rng.randint(20, 60))) for _ in range(count)]
+
+
+def urls(rng: random.Random, count: int) -> List[str]:
+    samples = []
+    for _ in range(count):
+        path = '/'.join(rng.choice(WORDS) for _ in range(rng.randint(0, 4)))
+        scheme = rng.choice(['https://', 'http://', 'https://www.', 'www.', ''])
+        samples.append(f"{scheme}{rng.choice(DOMAINS)}/{path}")
+    return samples
+
+
+def addresses(rng: random.Random, count: int) -> List[str]:
+    samples = []
+    for _ in range(count):
+        city, state = rng.choice(CITIES)
+        samples.append(
+            f"{rng.randint(1, 9999)} {rng.choice(STREETS)} {rng.choice(STREET_TYPES)}, "
+            f"{city}, {state} {rng.randint(10000, 99999)}"
+        )
+    return samples
+
+
+def dates(rng: random.Random, count: int) -> List[str]:
+    formats = [
+        lambda: f"{rng.randint(2020, 2030)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        lambda: f"{rng.choice(MONTHS)} {rng.randint(1, 28)}, {rng.randint(2020, 2030)} {rng.randint(1, 12)}pm",
+        lambda: f"Meeting {rng.choice(['tomorrow', 'next week', 'today'])} at {rng.randint(1, 12)}:{rng.choice(['00', '30'])}",
+        lambda: f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/{rng.randint(2020, 2030)}",
+    ]
+    return [rng.choice(formats)() for _ in range(count)]
+
+
+def math(rng: random.Random, count: int) -> List[str]:
+    formats = [
+        lambda: f"x^{rng.randint(2, 5)} + {rng.randint(1, 9)}x - {rng.randint(1, 9)} = 0",
+        lambda: f"sqrt({rng.choice('abcxyz')})/{rng.choice('bcn')}",
+        lambda: "sin(x)^2 + cos(x)^2 = 1",
+        lambda: f"({rng.randint(1, 9)}x+1)/(y-{rng.randint(1, 9)})",
+        lambda: "∑_{i=1}^n i = n(n+1)/2",
+        lambda: "The derivative of f(x) is f'(x)",
+    ]
+    return [rng.choice(formats)() for _ in range(count)]
+
+
+def pathological(rng: random.Random, count: int) -> List[str]:
+    """inputs aimed at backtracking in the classifier regexes"""
+    builders = [
+        lambda n: '1 ' + 'a ' * n,                     # house-number pattern with no street type
+        lambda n: '(' * n,                             # unclosed groups
+        lambda n: '[' + ',' * n,                       # range pattern without a close
+        lambda n: '9' * n,                             # one long number
+        lambda n: 'http' + 'x' * n,                    # near-miss URL
+        lambda n: ' '.join(rng.choice(WORDS) for _ in range(n)) + ' ' * n,
+    ]
+    return [builders[i % len(builders)](rng.randint(200, 800)) for i in range(count)]
+
+
+CORPORA = {
+    'short': short_clips,
+    'long': long_pastes,
+    'url': urls,
+    'address': addresses,
+    'date': dates,
+    'math': math,
+    'pathological': pathological,
+}
+
+
+def build_corpora(seed: int = 1234, size: int = 200) -> Dict[str, List[str]]:
+    """deterministic benchmark corpora; pathological inputs are kept to a tenth of size"""
+    corpora = {}
+    for name, builder in CORPORA.items():
+        rng = random.Random(f"{seed}:{name}")
+        corpora[name] = builder(rng, max(1, size // 10) if name == 'pathological' else size)
+    return corpora
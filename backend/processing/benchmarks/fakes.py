@@ -0,0 +1,265 @@
+"""Local stand-ins for Gemini, S3 and MongoDB
+
+install() puts fake google.generativeai, boto3 and pymongo modules into
+sys.modules, so it has to run before main (or anything importing those
+SDKs) is imported. Every fake keeps its state in memory, sleeps for the
+configured latency and counts what it was asked to do.
+"""
+import json
+import random
+import re
+import sys
+import threading
+import time
+import types
+from typing import Any, Dict, List, Optional
+
+
+class _Counters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values = {}
+
+    def add(self, name: str, amount: int = 1):
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + amount
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.values)
+
+
+def _sleep(latency: float, jitter: float = 0.0):
+    delay = latency + (random.uniform(-jitter, jitter) if jitter else 0.0)
+    if delay > 0:
+        time.sleep(delay)
+
+
+class FakeModelError(Exception):
+    pass
+
+
+class FakeGemini:
+    """google.generativeai with a configurable latency and error rate"""
+
+    DATE_TEXT = re.compile(r'Text: "(.*?)"', re.DOTALL)
+
+    def __init__(self, latency: float = 0.8, jitter: float = 0.2, error_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.counters = _Counters()
+
+    def generate(self, contents) -> str:
+        self.counters.add("calls")
+        _sleep(self.latency, self.jitter)
+        if self.error_rate and random.random() < self.error_rate:
+            self.counters.add("errors")
+            raise FakeModelError("fake model error")
+
+        if isinstance(contents, str):
+            # format_date prompt
+            self.counters.add("date_calls")
+            match = self.DATE_TEXT.search(contents)
+            summary = (match.group(1) if match else "Event")[:50]
+            return "```json\n" + json.dumps({
+                "start_date": "20300101T090000Z",
+                "end_date": "20300101T100000Z",
+                "summary": summary,
+                "has_valid_date": True
+            }) + "\n```"
+
+        self.counters.add("image_calls")
+        return r"x^{2} + 3x - 1 = 0"
+
+    def module(self) -> types.ModuleType:
+        fake = self
+
+        class GenerativeModel:
+            def __init__(self, model_name: str, **kwargs):
+                self.model_name = model_name
+
+            def generate_content(self, contents, request_options=None, **kwargs):
+                return types.SimpleNamespace(text=fake.generate(contents))
+
+        module = types.ModuleType("google.generativeai")
+        module.configure = lambda **kwargs: None
+        module.GenerativeModel = GenerativeModel
+        return module
+
+
+class FakeS3Client:
+    """the subset of the boto3 S3 client S3Storage uses, backed by a dict"""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.objects: Dict[str, Dict[str, Any]] = {}
+        self.counters = _Counters()
+        self._lock = threading.Lock()
+
+    def put_object(self, Bucket: str, Key: str, Body, ContentType: Optional[str] = None, **kwargs):
+        _sleep(self.latency)
+        body = Body.encode("utf-8") if isinstance(Body, str) else bytes(Body)
+        with self._lock:
+            self.objects[Key] = {"Body": body, "ContentType": ContentType, **kwargs}
+        self.counters.add("put_object")
+        self.counters.add("bytes", len(body))
+        return {"ETag": f'"{hash(body) & 0xffffffff:08x}"'}
+
+    def upload_fileobj(self, Fileobj, Bucket: str, Key: str, ExtraArgs: Optional[Dict[str, Any]] = None, Config=None):
+        self.counters.add("upload_fileobj")
+        self.put_object(Bucket=Bucket, Key=Key, Body=Fileobj.read(), **(ExtraArgs or {}))
+
+    def head_object(self, Bucket: str, Key: str, **kwargs):
+        _sleep(self.latency)
+        self.counters.add("head_object")
+        with self._lock:
+            stored = self.objects.get(Key)
+        if stored is None:
+            from botocore.exceptions import ClientError
+            raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+        return {"ContentLength": len(stored["Body"]), "ContentType": stored["ContentType"]}
+
+    def head_bucket(self, Bucket: str, **kwargs):
+        _sleep(self.latency)
+        self.counters.add("head_bucket")
+        return {}
+
+    def generate_presigned_url(self, ClientMethod: str, Params: Dict[str, Any], ExpiresIn: int = 3600, **kwargs):
+        return f"https://{Params['Bucket']}.s3.local/{Params['Key']}?expires={ExpiresIn}"
+
+    def put_bucket_policy(self, **kwargs):
+        return {}
+
+    def put_bucket_cors(self, **kwargs):
+        return {}
+
+    def put_public_access_block(self, **kwargs):
+        return {}
+
+    def module(self) -> types.ModuleType:
+        module = types.ModuleType("boto3")
+        module.client = lambda service_name, *args, **kwargs: self
+        module.s3 = types.ModuleType("boto3.s3")
+        module.s3.transfer = types.ModuleType("boto3.s3.transfer")
+        module.s3.transfer.TransferConfig = lambda **kwargs: types.SimpleNamespace(**kwargs)
+        return module
+
+
+class FakeCollection:
+    def __init__(self, store: "FakeMongo"):
+        self.store = store
+        self.documents: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def with_options(self, **kwargs):
+        return self
+
+    def insert_one(self, document: Dict[str, Any]):
+        _sleep(self.store.latency)
+        with self._lock:
+            self.documents.append(document)
+        self.store.counters.add("insert_one")
+        self.store.counters.add("documents")
+        return types.SimpleNamespace(inserted_id=document.get("_id"))
+
+    def insert_many(self, documents: List[Dict[str, Any]], ordered: bool = True, **kwargs):
+        _sleep(self.store.latency)
+        with self._lock:
+            self.documents.extend(documents)
+        self.store.counters.add("insert_many")
+        self.store.counters.add("documents", len(documents))
+        return types.SimpleNamespace(inserted_ids=[document.get("_id") for document in documents])
+
+    def count_documents(self, filter: Dict[str, Any], **kwargs) -> int:
+        with self._lock:
+            return len(self.documents)
+
+
+class FakeMongo:
+    """pymongo.MongoClient over in-memory collections"""
+
+    def __init__(self, latency: float = 0.01):
+        self.latency = latency
+        self.counters = _Counters()
+        self.collections: Dict[str, FakeCollection] = {}
+        self._lock = threading.Lock()
+
+    def collection(self, name: str) -> FakeCollection:
+        with self._lock:
+            if name not in self.collections:
+                self.collections[name] = FakeCollection(self)
+            return self.collections[name]
+
+    def module(self) -> types.ModuleType:
+        store = self
+
+        class Database:
+            def __init__(self, name: str):
+                self.name = name
+
+            def __getitem__(self, collection_name: str) -> FakeCollection:
+                return store.collection(f"{self.name}.{collection_name}")
+
+            def __getattr__(self, collection_name: str) -> FakeCollection:
+                if collection_name.startswith("_"):
+                    raise AttributeError(collection_name)
+                return self[collection_name]
+
+        class MongoClient:
+            def __init__(self, host=None, *args, **kwargs):
+                self.admin = types.SimpleNamespace(command=lambda *a, **k: {"ok": 1.0})
+
+            def __getitem__(self, database_name: str) -> Database:
+                return Database(database_name)
+
+            def close(self):
+                pass
+
+        class WriteConcern:
+            def __init__(self, **document):
+                self.document = document
+
+        module = types.ModuleType("pymongo")
+        module.MongoClient = MongoClient
+        module.WriteConcern = WriteConcern
+        return module
+
+
+class FakeServices:
+    def __init__(self, gemini: FakeGemini, s3: FakeS3Client, mongo: FakeMongo):
+        self.gemini = gemini
+        self.s3 = s3
+        self.mongo = mongo
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "gemini": self.gemini.counters.snapshot(),
+            "s3": {**self.s3.counters.snapshot(), "objects": len(self.s3.objects)},
+            "mongo": self.mongo.counters.snapshot()
+        }
+
+
+def install(model_latency: float = 0.8, model_jitter: float = 0.2, model_error_rate: float = 0.0,
+            s3_latency: float = 0.05, mongo_latency: float = 0.01) -> FakeServices:
+    """replace the Gemini, boto3 and pymongo modules with in-process fakes"""
+    services = FakeServices(
+        FakeGemini(model_latency, model_jitter, model_error_rate),
+        FakeS3Client(s3_latency),
+        FakeMongo(mongo_latency)
+    )
+
+    genai = services.gemini.module()
+    try:
+        import google
+    except ImportError:
+        google = types.ModuleType("google")
+    google.generativeai = genai
+    sys.modules["google"] = google
+    sys.modules["google.generativeai"] = genai
+    boto3 = services.s3.module()
+    sys.modules["boto3"] = boto3
+    sys.modules["boto3.s3"] = boto3.s3
+    sys.modules["boto3.s3.transfer"] = boto3.s3.transfer
+    sys.modules["pymongo"] = services.mongo.module()
+    return services
@@ -0,0 +1,297 @@
+"""End-to-end load test of main.py against local fakes
+
+Run from backend/processing:
+
+    python -m benchmarks.loadtest --rate 50 --duration 30
+    python -m benchmarks.loadtest --mix process=1 --rate 500 --model-latency 0.2
+
+Gemini, S3 and MongoDB are replaced by the in-process stand-ins in
+benchmarks/fakes.py, the app is served by uvicorn on a local port and
+requests are sent open-loop at --rate per second across --mix. Latency is
+measured from each request's scheduled send time, so a server that falls
+behind shows up in the percentiles instead of silently lowering the rate.
+"""
+import argparse
+import contextlib
+import http.client
+import io
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from . import fakes
+from .corpus import addresses, dates, math, short_clips, urls
+
+ENDPOINTS = {
+    'process': '/process',
+    'image': '/process-image',
+    'calendar': '/create-calendar-event',
+}
+
+# calendar texts Gemini would be asked about (relative) and ones parsed locally
+RELATIVE_EVENTS = [
+    'Lunch with the team tomorrow at 1pm',
+    'Dentist next Tuesday 3:30pm',
+    'Standup every Monday at 9',
+    'Call mom this weekend',
+]
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r}; expected one of {', '.join(ENDPOINTS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+class PayloadFactory:
+    """request bodies; a unique_ratio share are fresh, the rest repeat from a small pool so caches get hits"""
+
+    def __init__(self, seed: int, unique_ratio: float, pool_size: int = 20):
+        self.rng = random.Random(seed)
+        self.unique_ratio = unique_ratio
+        self.counter = 0
+        self.lock = threading.Lock()
+        self.pools = {name: [self._fresh(name) for _ in range(pool_size)] for name in ENDPOINTS}
+
+    def _next_id(self) -> int:
+        with self.lock:
+            self.counter += 1
+            return self.counter
+
+    def _fresh(self, name: str) -> Tuple[bytes, str]:
+        n = self._next_id()
+        if name == 'process':
+            generator = self.rng.choice([short_clips, urls, math, dates, addresses])
+            text = f"{generator(self.rng, 1)[0]} {n}"
+            return json.dumps({'text': text}).encode(), 'application/json'
+        if name == 'calendar':
+            if self.rng.random() < 0.5:
+                text = f"{self.rng.choice(RELATIVE_EVENTS)} #{n}"
+            else:
+                text = f"{dates(self.rng, 1)[0]} review #{n}"
+            return json.dumps({'text': text, 'description': 'load test'}).encode(), 'application/json'
+        return self._image(n), 'image/png'
+
+    def _image(self, n: int) -> bytes:
+        from PIL import Image, ImageDraw
+
+        image = Image.new('RGB', (480, 120), 'white')
+        draw = ImageDraw.Draw(image)
+        draw.text((12, 40), f"x^2 + {n}x - {self.rng.randint(1, 99)} = 0", fill='black')
+        output = io.BytesIO()
+        image.save(output, format='PNG')
+        return output.getvalue()
+
+    def next(self, name: str) -> Tuple[bytes, str]:
+        if self.rng.random() < self.unique_ratio:
+            return self._fresh(name)
+        return self.rng.choice(self.pools[name])
+
+
+class LoadClient:
+    """one keep-alive connection per worker thread"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {name: [] for name in ENDPOINTS}
+        self.errors: Dict[str, int] = {name: 0 for name in ENDPOINTS}
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=120)
+            self.local.connection = connection
+        return connection
+
+    def request(self, method: str, path: str, body: bytes = None, content_type: str = None) -> Tuple[int, bytes]:
+        headers = {'Content-Type': content_type} if content_type else {}
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, ConnectionError):
+                connection.close()
+                self.local.connection = None
+                if attempt:
+                    raise
+
+    def wait_ready(self, timeout: float = 15.0):
+        """wait for /readyz so S3 and Mongo fakes are connected before the clock starts"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            status, _ = self.request('GET', '/readyz')
+            if status == 200:
+                return
+            time.sleep(0.05)
+        raise RuntimeError("app did not become ready")
+
+    def send(self, name: str, body: bytes, content_type: str, scheduled: float):
+        ok = False
+        try:
+            status, payload = self.request('POST', ENDPOINTS[name], body, content_type)
+            ok = status == 200 and 'error' not in json.loads(payload)
+        except Exception:
+            pass
+        latency = time.perf_counter() - scheduled
+        with self.lock:
+            self.samples[name].append(latency)
+            if not ok:
+                self.errors[name] += 1
+
+
+def start_server(app, port: int):
+    import uvicorn
+
+    config = uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning', lifespan='on')
+    server = uvicorn.Server(config)
+    # signal handlers can only be installed from the main thread
+    server.install_signal_handlers = lambda: None
+    thread = threading.Thread(target=server.run, name='loadtest-server', daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("server failed to start")
+        time.sleep(0.05)
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+    return server, thread, bound_port
+
+
+def run_load(client: LoadClient, payloads: PayloadFactory, weights: Dict[str, float],
+             rate: float, duration: float, concurrency: int) -> float:
+    """send requests open-loop for duration seconds; returns the elapsed wall time"""
+    names = list(weights)
+    cumulative = list(itertools.accumulate(weights.values()))
+    interval = 1.0 / rate
+    rng = random.Random(0)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='loadtest-client') as pool:
+        sent = 0
+        while True:
+            scheduled = started + sent * interval
+            if scheduled - started >= duration:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pick = rng.random() * cumulative[-1]
+            name = next(n for n, edge in zip(names, cumulative) if pick < edge)
+            body, content_type = payloads.next(name)
+            pool.submit(client.send, name, body, content_type, scheduled)
+            sent += 1
+    return time.perf_counter() - started
+
+
+def summarize(client: LoadClient, elapsed: float) -> Dict[str, Dict[str, float]]:
+    report = {}
+    for name, samples in client.samples.items():
+        if not samples:
+            continue
+        ordered = sorted(samples)
+        report[name] = {
+            'requests': len(ordered),
+            'errors': client.errors[name],
+            'throughput_rps': round(len(ordered) / elapsed, 2),
+            'p50_ms': round(_percentile(ordered, 0.50) * 1000, 2),
+            'p95_ms': round(_percentile(ordered, 0.95) * 1000, 2),
+            'p99_ms': round(_percentile(ordered, 0.99) * 1000, 2),
+            'max_ms': round(ordered[-1] * 1000, 2),
+        }
+    return report
+
+
+def print_report(report: Dict[str, Dict[str, float]], elapsed: float, target_rate: float, services: dict):
+    total = sum(stats['requests'] for stats in report.values())
+    print(f"{total} requests in {elapsed:.1f}s ({total / elapsed:.1f}/s, target {target_rate:g}/s)")
+    print(f"{'endpoint':<10} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, stats in report.items():
+        print(f"{name:<10} {stats['requests']:>9} {stats['errors']:>7} {stats['throughput_rps']:>8.1f} "
+              f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+    print(f"fakes: {json.dumps(services, sort_keys=True)}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the processing API against local fakes")
+    parser.add_argument('--rate', type=float, default=50, help="requests per second across all endpoints")
+    parser.add_argument('--duration', type=float, default=30, help="seconds to send requests for")
+    parser.add_argument('--mix', type=parse_mix, default='process=6,image=1,calendar=3',
+                        help="endpoint weights, e.g. process=6,image=1,calendar=3")
+    parser.add_argument('--concurrency', type=int, default=64, help="client worker threads")
+    parser.add_argument('--unique-ratio', type=float, default=0.5,
+                        help="share of requests with a never-seen payload; the rest repeat and can hit caches")
+    parser.add_argument('--model-latency', type=float, default=0.8, help="fake Gemini seconds per call")
+    parser.add_argument('--model-jitter', type=float, default=0.2)
+    parser.add_argument('--model-error-rate', type=float, default=0.0)
+    parser.add_argument('--s3-latency', type=float, default=0.05)
+    parser.add_argument('--mongo-latency', type=float, default=0.01)
+    parser.add_argument('--port', type=int, default=0, help="0 picks a free port")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    parser.add_argument('--verbose', action='store_true', help="keep the app's own output")
+    args = parser.parse_args(argv)
+
+    services = fakes.install(args.model_latency, args.model_jitter, args.model_error_rate,
+                             args.s3_latency, args.mongo_latency)
+
+    # everything the app writes to disk goes to a scratch directory, not the current one
+    workdir = tempfile.mkdtemp(prefix='clipsmart-loadtest-')
+    os.environ['LATEX_CACHE_PATH'] = os.path.join(workdir, 'latex_cache.sqlite3')
+    os.environ['MONGO_SPOOL_PATH'] = os.path.join(workdir, 'mongo_spool.jsonl')
+    os.environ['S3_KNOWN_KEYS_PATH'] = os.path.join(workdir, 's3_known_keys.bloom')
+    os.environ['PROFILE_DIR'] = os.path.join(workdir, 'profiles')
+
+    with contextlib.ExitStack() as stack:
+        if not args.verbose:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, 'w'))))
+        import main as app_main
+
+        server, thread, port = start_server(app_main.app, args.port)
+        client = LoadClient('127.0.0.1', port)
+        client.wait_ready()
+        payloads = PayloadFactory(args.seed, args.unique_ratio)
+        elapsed = run_load(client, payloads, args.mix, args.rate, args.duration, args.concurrency)
+
+        _, cache_stats = client.request('GET', '/cache-stats')
+        server.should_exit = True
+        thread.join()
+
+    report = summarize(client, elapsed)
+    service_stats = services.stats()
+    if args.json:
+        print(json.dumps({
+            'elapsed_s': round(elapsed, 2),
+            'endpoints': report,
+            'fakes': service_stats,
+            'cache_stats': json.loads(cache_stats)
+        }, indent=2))
+    else:
+        print_report(report, elapsed, args.rate, service_stats)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
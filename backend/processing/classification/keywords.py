@@ -0,0 +1,108 @@
+from collections import deque
+
+
+def _is_word_char(char: str) -> bool:
+    """same definition of a word character as re's \\b on str patterns"""
+    return char.isalnum() or char == '_'
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over literal keywords
+
+    Each keyword is added with a label; `scan` walks the text once and returns
+    the set of labels whose keywords occur in it. Keywords added with
+    word_boundary=True only count when they are not surrounded by word
+    characters, matching re.search(r'\\b' + re.escape(keyword) + r'\\b', text).
+    """
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self._labels = set()
+        self._built = False
+
+    def add(self, keyword: str, label: str, word_boundary: bool = False):
+        if not keyword:
+            raise ValueError("keyword must not be empty")
+
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = next_node
+
+        entry = (label, len(keyword), word_boundary)
+        if entry not in self._out[node]:
+            self._out[node] = self._out[node] + (entry,)
+        self._labels.add(label)
+        self._built = False
+
+    def add_all(self, keywords, label: str, word_boundary: bool = False):
+        for keyword in keywords:
+            self.add(keyword, label, word_boundary)
+
+    def build(self):
+        """compute failure links and merge outputs along them"""
+        goto, fail, out = self._goto, self._fail, self._out
+        queue = deque()
+        for child in goto[0].values():
+            fail[child] = 0
+            queue.append(child)
+
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fallback = goto[state].get(char, 0)
+                fail[child] = fallback if fallback != child else 0
+                if out[fail[child]]:
+                    out[child] = out[child] + out[fail[child]]
+
+        self._built = True
+        return self
+
+    @property
+    def labels(self) -> frozenset:
+        return frozenset(self._labels)
+
+    def scan(self, text: str) -> set:
+        """return the labels of every keyword found in text"""
+        if not self._built:
+            self.build()
+
+        goto, fail, out = self._goto, self._fail, self._out
+        remaining = len(self._labels)
+        found = set()
+        node = 0
+        last = len(text) - 1
+
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            for label, length, word_boundary in out[node]:
+                if label in found:
+                    continue
+                if word_boundary:
+                    start = i - length + 1
+                    before = start > 0 and _is_word_char(text[start - 1])
+                    if before == _is_word_char(text[start]):
+                        continue
+                    after = i < last and _is_word_char(text[i + 1])
+                    if after == _is_word_char(char):
+                        continue
+                found.add(label)
+                if len(found) == remaining:
+                    return found
+
+        return found
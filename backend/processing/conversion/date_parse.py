@@ -0,0 +1,205 @@
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python 3.8
+    ZoneInfo = None
+
+from classification.classify import MONTHS, NUMERICAL_DATE_PATTERNS, WRITTEN_DATE_PATTERNS
+from app_logging import get_logger
+
+log = get_logger("date_parse")
+
+# fixed offsets for the zone suffixes checkDate recognises
+ZONE_OFFSETS = {
+    "utc": 0, "gmt": 0,
+    "est": -5, "cst": -6, "mst": -7, "pst": -8
+}
+
+_ZONE = r'(?:\s*(?P<zone>' + '|'.join(ZONE_OFFSETS) + r'))?'
+
+# 2025-03-14, 2025-03-14 15:00, 2025-03-14T15:00:30; classify's ISO pattern
+# captures neither the clock nor a zone, so this one is spelled out
+ISO_PATTERN = re.compile(
+    r'\b(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})'
+    r'(?:[T\s](?P<hour>\d{2}):(?P<minute>\d{2})(?::(?P<second>\d{2}))?' + _ZONE + r')?\b',
+    re.IGNORECASE
+)
+
+# the rest are checkDate's own patterns, with the role of each capture group
+DATE_PATTERNS = [
+    (ISO_PATTERN, None),
+    # 2025/03/14, 2025.03.14
+    (re.compile(NUMERICAL_DATE_PATTERNS[2]), ('year', 'month', 'day')),
+    # March 14, 2025 / Mar 14th 2025
+    (re.compile(WRITTEN_DATE_PATTERNS[0], re.IGNORECASE), ('month_name', 'day', None, 'year')),
+    # 14 March 2025
+    (re.compile(WRITTEN_DATE_PATTERNS[1], re.IGNORECASE), ('day', 'month_name', 'year')),
+    # 03/14/2025 and 14/03/2025; 03/04/2025 matches both ways and is left to the model
+    (re.compile(NUMERICAL_DATE_PATTERNS[0]), ('month', 'day', 'year')),
+    (re.compile(NUMERICAL_DATE_PATTERNS[1]), ('day', 'month', 'year')),
+]
+
+_TIME = (r'(?:(?P<{p}hour12>1[0-2]|0?[1-9])(?::(?P<{p}minute12>[0-5][0-9]))?\s*(?P<{p}ampm>[ap])\.?m\.?'
+         r'|(?P<{p}hour24>[01]?[0-9]|2[0-3]):(?P<{p}minute24>[0-5][0-9]))')
+
+TIME_PATTERN = re.compile(r'(?<![\w:])' + _TIME.format(p='') + _ZONE + r'(?![\w:])', re.IGNORECASE)
+TIME_RANGE_PATTERN = re.compile(
+    r'(?<![\w:])' + _TIME.format(p='start_') + r'\s*(?:-|–|to|until)\s*' + _TIME.format(p='end_') + _ZONE + r'(?![\w:])',
+    re.IGNORECASE
+)
+
+RELATIVE_WORDS = re.compile(
+    r'\b(today|tonight|tomorrow|yesterday|next|last|this|ago|every|'
+    r'monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b',
+    re.IGNORECASE
+)
+
+FILLER_WORDS = re.compile(r'\b(at|on|from|by)\b', re.IGNORECASE)
+
+# left over after the date and time are cut out, these mean part of the
+# schedule was not understood (a bare "at 3", "noon", "for 2 hours", "15:00Z"),
+# so the text goes to the model instead of getting a 9:00 or one-hour default
+UNPARSED_SCHEDULE = re.compile(
+    r'\d'
+    r'|\b(?:noon|midday|midnight|morning|afternoon|evening|night|eod|eob|cob|all[- ]day)\b'
+    r'|\b(?:hours?|hrs?|minutes?|mins?|days?|weeks?)\b'
+    r'|\b(?:utc|gmt)\b',
+    re.IGNORECASE
+)
+# zone abbreviations the offsets table does not know (CET, BST, AEST, ET, ...)
+ZONE_LIKE = re.compile(r'\b[A-Z]{1,4}T\b')
+
+_warned_zoneinfo = False
+
+ICS_FORMAT = "%Y%m%dT%H%M%SZ"
+
+
+def _month_number(name: str) -> int:
+    return [m[:3] for m in MONTHS[:12]].index(name[:3].lower()) + 1
+
+
+def _resolve_zone(zone_name: Optional[str], default_timezone: str):
+    if zone_name:
+        return timezone(timedelta(hours=ZONE_OFFSETS[zone_name.lower()]))
+    if default_timezone.upper() == "UTC":
+        return timezone.utc
+    if ZoneInfo is None:
+        global _warned_zoneinfo
+        if not _warned_zoneinfo:
+            _warned_zoneinfo = True
+            log.warning("zoneinfo unavailable; calendar times without a zone are read as UTC",
+                        calendar_timezone=default_timezone)
+        return timezone.utc
+    return ZoneInfo(default_timezone)
+
+
+def _clock(match, prefix: str = ''):
+    """(hour, minute) from a TIME match group set"""
+    if match.group(prefix + 'hour24') is not None:
+        return int(match.group(prefix + 'hour24')), int(match.group(prefix + 'minute24'))
+    hour = int(match.group(prefix + 'hour12')) % 12
+    if match.group(prefix + 'ampm').lower() == 'p':
+        hour += 12
+    return hour, int(match.group(prefix + 'minute12') or 0)
+
+
+def _date_groups(match, roles) -> dict:
+    if roles is None:
+        return match.groupdict()
+    return {role: value for role, value in zip(roles, match.groups()) if role}
+
+
+def _find_date(text: str):
+    """the single calendar date in text as (year, month, day, match), or None"""
+    found = []
+    for pattern, roles in DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            groups = _date_groups(match, roles)
+            month = int(groups['month']) if groups.get('month') else _month_number(groups['month_name'])
+            date = (int(groups['year']), month, int(groups['day']))
+            for *other_date, other in found:
+                if match.start() < other.end() and other.start() < match.end():
+                    if tuple(other_date) != date:
+                        # the same text read as two different dates
+                        return None
+                    break
+            else:
+                found.append((*date, match))
+
+    return found[0] if len(found) == 1 else None
+
+
+def parse_date_locally(text: str, default_timezone: str = "UTC") -> Optional[dict]:
+    """resolve unambiguous absolute dates without the LLM
+
+    Returns the same structure format_date produces, or None when the text
+    is relative, has several dates or times, or anything else the regexes
+    cannot settle. Dates without a time get 9:00-10:00 and events without an
+    end time last one hour, matching the Gemini prompt. Times are read in
+    the zone named in the text (EST, PST, UTC, ...) or default_timezone.
+    """
+    if not text or RELATIVE_WORDS.search(text):
+        return None
+
+    date_match = _find_date(text)
+    if date_match is None:
+        return None
+    year, month, day, match = date_match
+
+    rest = text[:match.start()] + ' ' + text[match.end():]
+    zone_name = match.groupdict().get('zone')
+    start_clock = end_clock = None
+
+    if match.groupdict().get('hour') is not None:
+        start_clock = (int(match.group('hour')), int(match.group('minute')), int(match.group('second') or 0))
+        if start_clock[0] > 23:
+            return None
+    else:
+        ranges = list(TIME_RANGE_PATTERN.finditer(rest))
+        times = list(TIME_PATTERN.finditer(rest))
+        if len(ranges) == 1:
+            time_match = ranges[0]
+            start_clock, end_clock = _clock(time_match, 'start_'), _clock(time_match, 'end_')
+        elif len(times) == 1:
+            time_match = times[0]
+            start_clock = _clock(time_match)
+        elif times:
+            return None
+        else:
+            time_match = None
+
+        if time_match is not None:
+            zone_name = time_match.group('zone') or zone_name
+            rest = rest[:time_match.start()] + ' ' + rest[time_match.end():]
+
+    if TIME_PATTERN.search(rest) or any(pattern.search(rest) for pattern, _ in DATE_PATTERNS):
+        return None
+    if UNPARSED_SCHEDULE.search(rest) or ZONE_LIKE.search(rest):
+        return None
+
+    try:
+        tz = _resolve_zone(zone_name, default_timezone)
+        if start_clock is None:
+            start = datetime(year, month, day, 9, 0, tzinfo=tz)
+            end = datetime(year, month, day, 10, 0, tzinfo=tz)
+        else:
+            start = datetime(year, month, day, *start_clock, tzinfo=tz)
+            end = start + timedelta(hours=1)
+            if end_clock is not None:
+                end = datetime(year, month, day, end_clock[0], end_clock[1], tzinfo=tz)
+                if end <= start:
+                    end += timedelta(days=1)
+    except (ValueError, KeyError):
+        return None
+
+    summary = FILLER_WORDS.sub(' ', rest)
+    summary = re.sub(r'\s+', ' ', summary).strip(' ,.;:-–')
+    return {
+        "start_date": start.astimezone(timezone.utc).strftime(ICS_FORMAT),
+        "end_date": end.astimezone(timezone.utc).strftime(ICS_FORMAT),
+        "summary": summary[:50] or "Event",
+        "has_valid_date": True
+    }
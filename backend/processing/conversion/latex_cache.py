@@ -0,0 +1,181 @@
+import io
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import PIL.Image
+
+from cache import TTLCache, content_hash
+from metrics import time_stage
+from app_logging import get_logger
+
+log = get_logger("latex_cache")
+
+
+def perceptual_hash(image) -> str:
+    """64-bit difference hash (dHash) of an image as 16 hex chars
+
+    Re-captures of the same equation differ in exact bytes but shrink to
+    the same 9x8 grayscale gradient pattern.
+    """
+    small = image.convert("L").resize((9, 8), PIL.Image.LANCZOS)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(8):
+        offset = row * 9
+        for col in range(8):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{bits:016x}"
+
+
+def _hamming(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+# the 64-bit phash is stored as four indexed 16-bit bands; two hashes within
+# 3 bits of each other always share a band, so near matches are looked up
+# among rows sharing one instead of scanning the table
+PHASH_BANDS = 4
+MAX_PHASH_DISTANCE = PHASH_BANDS - 1
+
+
+def _bands(phash: str) -> list:
+    width = len(phash) // PHASH_BANDS
+    return [phash[i * width:(i + 1) * width] for i in range(PHASH_BANDS)]
+
+
+class LatexCache:
+    """two-tier image -> LaTeX cache
+
+    An in-memory LRU sits in front of a SQLite table that survives restarts.
+    Entries are keyed by the sha256 of the image bytes; with use_phash the
+    perceptual hash is stored too, so visually identical screenshots match
+    when the exact bytes do not (within phash_distance differing bits).
+    Near matches are searched among rows sharing a phash band, which finds
+    all of them up to a distance of 3 bits, so larger distances are rejected.
+
+    lookup() and store() hash the image and touch SQLite; call them from a
+    worker thread, not the event loop.
+    """
+
+    def __init__(self, path: str = "latex_cache.sqlite3", memory_size: int = 256,
+                 use_phash: bool = False, phash_distance: int = 0):
+        if not 0 <= phash_distance <= MAX_PHASH_DISTANCE:
+            raise ValueError(f"phash_distance must be between 0 and {MAX_PHASH_DISTANCE}")
+        self.path = path
+        self.use_phash = use_phash
+        self.phash_distance = phash_distance
+        self.memory = TTLCache(max_size=memory_size, ttl=None)
+        self.disk_hits = 0
+        self.phash_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._open()
+
+    def _open(self):
+        try:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS latex_cache ("
+                "content_hash TEXT PRIMARY KEY, "
+                "phash TEXT, "
+                "band0 TEXT, band1 TEXT, band2 TEXT, band3 TEXT, "
+                "latex TEXT NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS latex_cache_phash ON latex_cache (phash)")
+            for band in range(PHASH_BANDS):
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS latex_cache_band{band} ON latex_cache (band{band})")
+            self._conn.commit()
+        except sqlite3.Error as e:
+            log.warning("LaTeX cache disk store unavailable, using memory only", error=str(e))
+            self._conn = None
+
+    def _query(self, sql: str, params=()) -> list:
+        if self._conn is None:
+            return []
+        try:
+            with self._lock:
+                return self._conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            log.error("LaTeX cache read failed", error=str(e))
+            return []
+
+    def _phash_of(self, image_bytes: bytes, image=None) -> Optional[str]:
+        try:
+            with time_stage("pil"):
+                if image is None:
+                    image = PIL.Image.open(io.BytesIO(image_bytes))
+                return perceptual_hash(image)
+        except Exception as e:
+            log.warning("perceptual hash failed", error=str(e))
+            return None
+
+    def lookup(self, image_bytes: bytes, image=None) -> Optional[str]:
+        """return cached LaTeX for these image bytes, or None"""
+        key = content_hash(image_bytes)
+
+        latex = self.memory.get(key)
+        if latex is not None:
+            return latex
+
+        rows = self._query("SELECT latex FROM latex_cache WHERE content_hash = ?", (key,))
+        if rows:
+            self.disk_hits += 1
+            self.memory.set(key, rows[0][0])
+            return rows[0][0]
+
+        if self.use_phash:
+            phash = self._phash_of(image_bytes, image)
+            if phash is not None:
+                if self.phash_distance > 0:
+                    where = " OR ".join(f"band{band} = ?" for band in range(PHASH_BANDS))
+                    candidates = self._query(f"SELECT phash, latex FROM latex_cache WHERE {where}", _bands(phash))
+                    distances = [(_hamming(phash, other), latex) for other, latex in candidates]
+                    rows = [(latex,) for distance, latex in sorted(distances) if distance <= self.phash_distance]
+                else:
+                    rows = self._query("SELECT latex FROM latex_cache WHERE phash = ? LIMIT 1", (phash,))
+                if rows:
+                    self.phash_hits += 1
+                    self.memory.set(key, rows[0][0])
+                    return rows[0][0]
+
+        self.misses += 1
+        return None
+
+    def store(self, image_bytes: bytes, latex: str, image=None):
+        key = content_hash(image_bytes)
+        self.memory.set(key, latex)
+
+        if self._conn is None:
+            return
+        phash = self._phash_of(image_bytes, image) if self.use_phash else None
+        bands = _bands(phash) if phash else [None] * PHASH_BANDS
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO latex_cache (content_hash, phash, latex, created_at, band0, band1, band2, band3) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, phash, latex, time.time(), *bands)
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            log.error("LaTeX cache write failed", error=str(e))
+
+    def stats(self) -> Dict[str, Any]:
+        rows = self._query("SELECT COUNT(*) FROM latex_cache")
+        return {
+            "memory": self.memory.stats(),
+            "disk_entries": rows[0][0] if rows else 0,
+            "disk_hits": self.disk_hits,
+            "phash_hits": self.phash_hits,
+            "misses": self.misses
+        }
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
@@ -1,13 +1,76 @@
-import google.generativeai as genai
+import io
+import threading
+
 import PIL.Image
 
-def image_to_latex(image_path, api_key):
-    """convert image to LaTeX using Gemini API"""
-    genai.configure(api_key=api_key)
+from metrics import time_stage
+
+_genai_lock = threading.Lock()
+_configured_key = None
+
+def load_genai(api_key):
+    """import and configure the Gemini SDK on first use
+
+    the SDK import takes around a second, so it is kept off the startup path
+    """
+    global _configured_key
+    import google.generativeai as genai
+    if api_key != _configured_key:
+        with _genai_lock:
+            if api_key != _configured_key:
+                genai.configure(api_key=api_key)
+                _configured_key = api_key
+    return genai
+
+# formats Gemini accepts as raw image bytes
+MODEL_MIME_TYPES = {"image/png", "image/jpeg", "image/gif", "image/webp", "image/heic", "image/heif"}
+
+def _image_mime_type(data):
+    """sniff the image type from its magic bytes; None when unrecognized"""
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if data.startswith(b"RIFF") and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+def _image_part(image):
+    """model input for a path, raw bytes, file-like object or PIL image
+
+    encoded bytes go to the model as-is, so in-memory screenshots are never
+    decoded, re-encoded or written to disk
+    """
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        data = bytes(image)
+        mime_type = _image_mime_type(data)
+        if mime_type is None:
+            # BMP, TIFF, ...: ask PIL, and hand formats the model does not
+            # take as the decoded image for the SDK to re-encode
+            decoded = PIL.Image.open(io.BytesIO(data))
+            mime_type = PIL.Image.MIME.get(decoded.format)
+            if mime_type not in MODEL_MIME_TYPES:
+                return decoded
+        return {"mime_type": mime_type, "data": data}
+    if hasattr(image, "read"):
+        return _image_part(image.read())
+    if isinstance(image, PIL.Image.Image):
+        return image
+    return PIL.Image.open(image)
+
+def image_to_latex(image, api_key, timeout=None):
+    """convert image to LaTeX using Gemini API
+
+    image may be a file path, encoded image bytes, a file-like object or a
+    PIL image
+    """
+    genai = load_genai(api_key)
     model = genai.GenerativeModel('gemini-2.5-flash')
 
     try:
-        img = PIL.Image.open(image_path)
+        img = _image_part(image)
         
         prompt = """
         Transcribe the content in this image into LaTeX code. 
@@ -15,7 +78,9 @@ def image_to_latex(image_path, api_key):
         Focus on accuracy and proper LaTeX syntax for mathematical expressions.
         Return only the LaTeX code without any explanations, headers, or extra text.
         """
-        response = model.generate_content([prompt, img])
+        request_options = {"timeout": timeout} if timeout else None
+        with time_stage("gemini"):
+            response = model.generate_content([prompt, img], request_options=request_options)
         return response.text
     except Exception as e:
         return f"An error occurred: {e}"
@@ -0,0 +1,97 @@
+import io
+import time
+from typing import Any, Dict, Tuple
+
+import PIL.Image
+import PIL.ImageChops
+
+from metrics import time_stage
+
+
+def _flatten(image):
+    """drop alpha by compositing onto white, as the screenshot would be viewed"""
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        rgba = image.convert("RGBA")
+        background = PIL.Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+        return PIL.Image.alpha_composite(background, rgba).convert("RGB")
+    return image
+
+
+def _trim(image, threshold: int, padding: int):
+    """crop borders that match the top-left pixel colour"""
+    gray = image.convert("L")
+    background = PIL.Image.new("L", gray.size, gray.getpixel((0, 0)))
+    diff = PIL.ImageChops.difference(gray, background).point(lambda value: 255 if value > threshold else 0)
+    bbox = diff.getbbox()
+    if bbox is None:
+        return image
+    left, top, right, bottom = bbox
+    return image.crop((
+        max(0, left - padding),
+        max(0, top - padding),
+        min(image.width, right + padding),
+        min(image.height, bottom + padding)
+    ))
+
+
+def preprocess_image(image_bytes: bytes, max_dimension: int = 1600, grayscale: bool = True,
+                     trim: bool = True, trim_threshold: int = 16, padding: int = 8) -> Tuple[bytes, Dict[str, Any]]:
+    """shrink a screenshot before LaTeX transcription
+
+    Trims uniform borders, converts to grayscale, downscales so neither side
+    exceeds max_dimension and re-encodes as optimized PNG. The original bytes
+    are kept when processing would not make them smaller. CPU bound; run it
+    in a worker thread.
+    """
+    started = time.perf_counter()
+    with time_stage("pil"):
+        image = PIL.Image.open(io.BytesIO(image_bytes))
+        image.load()
+    size_before = image.size
+
+    image = _flatten(image)
+    if trim:
+        image = _trim(image, trim_threshold, padding)
+    if grayscale:
+        image = image.convert("L")
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    if max_dimension and max(image.size) > max_dimension:
+        image.thumbnail((max_dimension, max_dimension), PIL.Image.LANCZOS)
+
+    output = io.BytesIO()
+    image.save(output, format="PNG", optimize=True)
+    processed = output.getvalue()
+
+    used_original = len(processed) >= len(image_bytes)
+    if used_original:
+        processed = image_bytes
+
+    stats = {
+        "bytes_before": len(image_bytes),
+        "bytes_after": len(processed),
+        "size_before": list(size_before),
+        "size_after": list(size_before if used_original else image.size),
+        "used_original": used_original,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
+    return processed, stats
+
+
+def encode_for_storage(image_bytes: bytes, image_format: str = "png") -> Tuple[bytes, str]:
+    """re-encode an image as optimized PNG or lossless WebP before upload
+
+    returns the bytes and their content type; for PNG the original bytes are
+    kept when re-encoding would not make them smaller
+    """
+    image = PIL.Image.open(io.BytesIO(image_bytes))
+    output = io.BytesIO()
+    if image_format == "webp":
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        image.save(output, format="WEBP", lossless=True, method=4)
+        return output.getvalue(), "image/webp"
+
+    image.save(output, format="PNG", optimize=True)
+    encoded = output.getvalue()
+    return (encoded if len(encoded) < len(image_bytes) else image_bytes), "image/png"
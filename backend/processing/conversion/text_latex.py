@@ -0,0 +1,312 @@
+import re
+from typing import List, Optional
+
+from classification.classify import MATH_FUNCTIONS
+
+MAX_TEXT_LENGTH = 500
+
+GREEK_LETTERS = {
+    'alpha', 'beta', 'gamma', 'delta', 'epsilon', 'varepsilon', 'zeta', 'eta',
+    'theta', 'vartheta', 'iota', 'kappa', 'lambda', 'mu', 'nu', 'xi', 'pi',
+    'rho', 'sigma', 'tau', 'upsilon', 'phi', 'varphi', 'chi', 'psi', 'omega',
+    'Gamma', 'Delta', 'Theta', 'Lambda', 'Xi', 'Pi', 'Sigma', 'Upsilon',
+    'Phi', 'Psi', 'Omega'
+}
+
+# functions LaTeX has a command for; the rest of MATH_FUNCTIONS use \operatorname
+LATEX_FUNCTIONS = {
+    'sin', 'cos', 'tan', 'sec', 'csc', 'cot', 'sinh', 'cosh', 'tanh',
+    'arcsin', 'arccos', 'arctan', 'log', 'ln', 'exp', 'max', 'min', 'gcd'
+}
+
+FUNCTIONS = set(MATH_FUNCTIONS) - {'gamma', 'beta'}
+
+SYMBOLS = {
+    '×': r'\times', '÷': r'\div', '±': r'\pm', '∓': r'\mp', '·': r'\cdot',
+    '≤': r'\leq', '≥': r'\geq', '≠': r'\neq', '≈': r'\approx', '≡': r'\equiv',
+    '∝': r'\propto', '∼': r'\sim', '≅': r'\cong',
+    '∈': r'\in', '∉': r'\notin', '⊂': r'\subset', '⊃': r'\supset', '⊆': r'\subseteq',
+    '⊇': r'\supseteq', '∩': r'\cap', '∪': r'\cup', '∅': r'\emptyset',
+    '∞': r'\infty', '∂': r'\partial', '∇': r'\nabla', '∆': r'\Delta',
+    '∑': r'\sum', 'Σ': r'\sum', '∏': r'\prod', '∫': r'\int', '∮': r'\oint',
+    '∧': r'\land', '∨': r'\lor', '¬': r'\neg', '→': r'\to', '↔': r'\leftrightarrow',
+    '⊕': r'\oplus', '⊗': r'\otimes', '∠': r'\angle', '⊥': r'\perp', '∥': r'\parallel',
+    '°': r'^{\circ}', '%': r'\%',
+    'α': r'\alpha', 'β': r'\beta', 'γ': r'\gamma', 'δ': r'\delta', 'ε': r'\epsilon',
+    'θ': r'\theta', 'λ': r'\lambda', 'μ': r'\mu', 'π': r'\pi', 'σ': r'\sigma',
+    'φ': r'\phi', 'ψ': r'\psi', 'ω': r'\omega'
+}
+
+# symbols written between two operands rather than as one
+BINARY_SYMBOLS = set('×÷±∓·≤≥≠≈≡∝∼≅∈∉⊂⊃⊆⊇∩∪∧∨→↔⊕⊗⊥∥')
+
+BINARY_OPERATORS = {
+    '+': '+', '-': '-', '*': r'\cdot', '=': '=', '<': '<', '>': '>',
+    '<=': r'\leq', '>=': r'\geq', '!=': r'\neq', ',': ','
+}
+
+TOKEN_PATTERN = re.compile(
+    r'\s*(?:'
+    r'(?P<scientific>\d+(?:\.\d*)?[eE][+-]?\d+)'
+    r'|(?P<number>\d{1,3}(?:,\d{3})+(?![\d,])(?:\.\d+)?|\d+(?:\.\d+)?)'
+    r'|(?P<ident>[A-Za-z]+)'
+    r'|(?P<op><=|>=|!=|\*\*|[-+*/^_=<>!,\'|()\[\]{}])'
+    r'|(?P<symbol>[' + re.escape(''.join(SYMBOLS)) + r'])'
+    r')'
+)
+
+CLOSING = {'(': ')', '[': ']', '{': '}'}
+
+PHONE_PATTERN = re.compile(r'^\s*\+?\d{0,3}[\s.-]?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\s*$')
+
+# shapes that tokenize as arithmetic but are dates, local phone numbers or
+# ranges with a unit: 12/25/2025, 2025-03-14, 555-1234, 10-15 min
+NOT_MATH_PATTERNS = [
+    re.compile(r'^\s*\d{1,4}[-/.]\d{1,2}[-/.]\d{2,4}\s*$'),
+    re.compile(r'^\s*\d{3}-\d{4}\s*$'),
+    re.compile(r'^\s*\d+(?:\.\d+)?\s*[-–]\s*\d+(?:\.\d+)?\s*[A-Za-z]{2,}\.?\s*$'),
+]
+
+# abbreviations written with a slash that would otherwise read as fractions
+SLASH_ABBREVIATIONS = {'i/o', 'n/a', 'w/o', 'a/c', 'y/n', 'and/or', 'either/or'}
+
+
+class NotMath(Exception):
+    pass
+
+
+class _Unit:
+    """an operand: latex as written, inner without its outer brackets"""
+
+    def __init__(self, latex: str, inner: Optional[str] = None):
+        self.latex = latex
+        self.inner = latex if inner is None else inner
+
+
+def _tokenize(text: str) -> List[tuple]:
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        if match is None or match.end() == position:
+            raise NotMath(f"unexpected character {text[position]!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+    return tokens
+
+
+def _join(left: str, right: str) -> str:
+    """concatenate, keeping a command like \\pi from swallowing a following letter"""
+    if re.search(r'\\[A-Za-z]+$', left) and right[:1].isalpha():
+        return left + ' ' + right
+    return left + right
+
+
+def _looks_like_non_math(text: str) -> bool:
+    return (text.strip().lower() in SLASH_ABBREVIATIONS
+            or PHONE_PATTERN.match(text) is not None
+            or any(pattern.match(text) for pattern in NOT_MATH_PATTERNS))
+
+
+def _number_latex(kind: str, token: str) -> str:
+    if kind == 'scientific':
+        mantissa, exponent = re.split('[eE]', token)
+        return mantissa + r'\times10^{' + exponent.lstrip('+') + '}'
+    # keep digit grouping from adding the space LaTeX puts after a comma
+    return token.replace(',', '{,}')
+
+
+class _Parser:
+    def __init__(self, tokens: List[tuple]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self, offset: int = 0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def expect(self, value: str):
+        kind, token = self.take()
+        if token != value or kind != 'op':
+            raise NotMath(f"expected {value!r}")
+
+    def parse_expression(self, closing: Optional[str] = None) -> str:
+        items = []
+        while True:
+            kind, token = self.peek()
+            if kind is None or (kind == 'op' and token in (')', ']', '}') and token == closing):
+                break
+            if kind == 'op' and token in (')', ']', '}'):
+                raise NotMath("unbalanced brackets")
+            if kind == 'op' and token == '|' and closing == '|':
+                break
+
+            if kind == 'op' and token in BINARY_OPERATORS:
+                self.take()
+                items.append(BINARY_OPERATORS[token])
+            elif kind == 'symbol' and token in BINARY_SYMBOLS:
+                self.take()
+                items.append(SYMBOLS[token])
+            elif kind == 'op' and token == '/':
+                self.take()
+                if not items or not isinstance(items[-1], _Unit):
+                    raise NotMath("division without a numerator")
+                numerator = items.pop()
+                denominator = self.parse_unit()
+                items.append(_Unit(r'\frac{' + numerator.inner + '}{' + denominator.inner + '}'))
+            else:
+                unit = self.parse_unit()
+                if items and isinstance(items[-1], _Unit):
+                    # implicit multiplication: 3x, 2(x+1); never 555 123 or (555)123
+                    if unit.latex[:1].isdigit():
+                        raise NotMath("number after an operand")
+                    items[-1] = _Unit(_join(items[-1].latex, unit.latex))
+                else:
+                    items.append(unit)
+
+        if items and not isinstance(items[-1], _Unit):
+            raise NotMath("operator without a right operand")
+
+        parts = []
+        for item in items:
+            if isinstance(item, _Unit):
+                parts.append(item.latex)
+            elif item == ',':
+                parts.append(', ')
+            elif not parts or parts[-1] in ('', ', ') or parts[-1].endswith(' '):
+                parts.append(item)
+            else:
+                parts.append(' ' + item + ' ')
+        return ''.join(parts).strip()
+
+    def parse_script(self, nested: bool) -> str:
+        """argument of ^ or _: an optional sign and a primary
+
+        exponents nest to the right (2^3^2); subscripts leave a following ^
+        to their base (x_i^2)
+        """
+        kind, token = self.peek()
+        sign = ''
+        if kind == 'op' and token in ('-', '+'):
+            self.take()
+            sign = token
+        argument = sign + self.parse_primary().inner
+        if nested and self.peek() in (('op', '^'), ('op', '**')):
+            self.take()
+            argument += '^{' + self.parse_script(nested=True) + '}'
+        return argument
+
+    def parse_unit(self) -> _Unit:
+        unit = self.parse_primary()
+        while True:
+            kind, token = self.peek()
+            if kind != 'op':
+                return unit
+            if token in ('^', '**'):
+                self.take()
+                unit = _Unit(unit.latex + '^{' + self.parse_script(nested=True) + '}')
+            elif token == '_':
+                self.take()
+                unit = _Unit(unit.latex + '_{' + self.parse_script(nested=False) + '}')
+            elif token == '!':
+                self.take()
+                unit = _Unit(unit.latex + '!')
+            elif token == "'":
+                self.take()
+                unit = _Unit(unit.latex + "'")
+            else:
+                return unit
+
+    def parse_group(self, opening: str) -> _Unit:
+        inner = self.parse_expression(closing=CLOSING[opening])
+        self.expect(CLOSING[opening])
+        if opening == '{':
+            return _Unit(r'\{' + inner + r'\}', inner)
+        left, right = (r'\left(', r'\right)') if opening == '(' else (r'\left[', r'\right]')
+        return _Unit(left + inner + right, inner)
+
+    def parse_primary(self) -> _Unit:
+        kind, token = self.take()
+        if kind is None:
+            raise NotMath("unexpected end of expression")
+
+        if kind in ('number', 'scientific'):
+            return _Unit(_number_latex(kind, token))
+        if kind == 'symbol':
+            return _Unit(SYMBOLS[token])
+        if kind == 'op':
+            if token in CLOSING:
+                return self.parse_group(token)
+            if token == '|':
+                inner = self.parse_expression(closing='|')
+                self.expect('|')
+                return _Unit(r'\left|' + inner + r'\right|', inner)
+            if token in ('-', '+'):
+                # unary sign
+                return _Unit(token + self.parse_unit().latex)
+            raise NotMath(f"unexpected operator {token!r}")
+
+        return self.parse_identifier(token)
+
+    def parse_identifier(self, name: str) -> _Unit:
+        lower = name.lower()
+        has_call = self.peek() == ('op', '(')
+
+        if lower == 'sqrt':
+            if not has_call:
+                raise NotMath("sqrt without an argument")
+            self.take()
+            inner = self.parse_expression(closing=')')
+            self.expect(')')
+            return _Unit(r'\sqrt{' + inner + '}')
+        if lower == 'abs' and has_call:
+            self.take()
+            inner = self.parse_expression(closing=')')
+            self.expect(')')
+            return _Unit(r'\left|' + inner + r'\right|')
+        if lower in FUNCTIONS:
+            command = '\\' + lower if lower in LATEX_FUNCTIONS else r'\operatorname{' + lower + '}'
+            if has_call:
+                self.take()
+                return _Unit(command + self.parse_group('(').latex)
+            kind, token = self.peek()
+            if kind is None or (kind == 'op' and (token in BINARY_OPERATORS or token in (')', ']', '}', '/'))):
+                # "10-15 min": a function name with nothing to apply to is a word
+                raise NotMath(f"{name!r} without an argument")
+            return _Unit(command)
+        if name in GREEK_LETTERS or lower in GREEK_LETTERS:
+            return _Unit('\\' + (name if name in GREEK_LETTERS else lower))
+        if len(name) <= 2:
+            # single variables, or a product of two like xy
+            return _Unit(name)
+        raise NotMath(f"unknown word {name!r}")
+
+
+def text_to_latex(text: str) -> Optional[str]:
+    """convert typed math such as 'x^2 + 3x - 1 = 0' or 'sqrt(a)/b' to LaTeX
+
+    Returns None when the text does not parse as a self-contained expression
+    (prose, unknown words, unbalanced brackets) or looks like a date, phone
+    number or range ("12/25/2025", "(555) 123-4567", "10-15 min"), in which
+    case the caller should fall back to screenshot transcription.
+    """
+    if not text or len(text) > MAX_TEXT_LENGTH or _looks_like_non_math(text):
+        return None
+    try:
+        tokens = _tokenize(text)
+        if not tokens:
+            return None
+        parser = _Parser(tokens)
+        latex = parser.parse_expression()
+        if parser.position != len(tokens):
+            return None
+        return latex or None
+    except (NotMath, RecursionError):
+        return None
@@ -1,52 +1,398 @@
-from pymongo import MongoClient
+from bson import ObjectId
 import os
+import queue
+import threading
+import time
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+from metrics import time_stage
+from app_logging import LogThrottle, get_logger
+from circuit_breaker import CircuitBreaker, OPEN
+from serialization import dumps, loads
+
+log = get_logger("mongo")
+
+def _encode_entry(entry: Dict[str, Any]) -> str:
+    return dumps({
+        **entry,
+        "_id": {"$oid": str(entry["_id"])},
+        "timestamp": {"$date": entry["timestamp"].isoformat()}
+    }).decode("utf-8")
+
+def _decode_entry(line: str) -> Dict[str, Any]:
+    entry = loads(line)
+    entry["_id"] = ObjectId(entry["_id"]["$oid"])
+    entry["timestamp"] = datetime.fromisoformat(entry["timestamp"]["$date"])
+    return entry
+
+def _only_duplicates(error: Exception) -> bool:
+    """True when a write failed only because the entries are already stored
+
+    log entries carry pre-generated _ids, so replaying a spool that was
+    partly written before is safe
+    """
+    if getattr(error, "code", None) == 11000:
+        return True
+    details = getattr(error, "details", None)
+    if not isinstance(details, dict) or details.get("writeConcernErrors"):
+        return False
+    write_errors = details.get("writeErrors") or []
+    return bool(write_errors) and all(write_error.get("code") == 11000 for write_error in write_errors)
+
+class LogSpool:
+    """append-only JSON lines file of log entries waiting for MongoDB
+
+    take() hands the replayer the current file under a separate name, so
+    new entries keep appending while it is being replayed; a replay that
+    stops early leaves that file to be taken again next time.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.replay_path = path + ".replaying"
+        self.spooled = 0
+        self._lock = threading.Lock()
+    
+    def append(self, entries: List[Dict[str, Any]]):
+        lines = "".join(_encode_entry(entry) + "\n" for entry in entries)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+            self.spooled += len(entries)
+    
+    def take(self) -> Optional[str]:
+        with self._lock:
+            if os.path.exists(self.replay_path):
+                return self.replay_path
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                os.replace(self.path, self.replay_path)
+                return self.replay_path
+        return None
+    
+    def read_batches(self, path: str, batch_size: int):
+        batch = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    batch.append(_decode_entry(line))
+                except (ValueError, KeyError, TypeError) as e:
+                    log.warning("skipping unreadable spool line", error=str(e))
+                    continue
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+    
+    def done(self, path: str):
+        with self._lock:
+            os.remove(path)
+    
+    def pending_bytes(self) -> int:
+        return sum(os.path.getsize(path) for path in (self.path, self.replay_path) if os.path.exists(path))
 
 class MongoDBStorage:
-    def __init__(self, connection_string: str = None, database_name: str = "clipsmart"):
+    """processing log storage in MongoDB
+
+    With buffered=True, log calls only enqueue the entry; a background thread
+    writes queued entries with insert_many once flush_size entries are
+    waiting or flush_interval seconds have passed, and close() flushes
+    whatever is left. Batches of flush_size or more entries skip the buffer
+    and go out as one insert_many, and entries that do not fit in a full
+    buffer are spooled rather than dropped.
+
+    pymongo is imported on first connect. With background_connect=True the
+    constructor returns at once and a thread keeps trying to connect, every
+    reconnect_interval seconds, until it succeeds; log calls made before
+    then are buffered or spooled like writes to a failing server. Each attempt gives up after connect_timeout seconds
+    rather than pymongo's 30 second default.
+
+    Writes go through a circuit breaker. When writes fail, or the breaker is
+    open and they are not attempted, entries are appended to spool_path,
+    and a background thread replays the spool in batches of replay_batch
+    every replay_interval seconds once the breaker lets a write through.
+    """
+
+    def __init__(self, connection_string: str = None, database_name: str = "clipsmart",
+                 buffered: bool = False, flush_size: int = 500, flush_interval: float = 1.0,
+                 max_buffer: int = 50000, ordered: bool = False, write_concern: Optional[Dict[str, Any]] = None,
+                 connect_timeout: float = 5.0, background_connect: bool = False, reconnect_interval: float = 5.0,
+                 write_timeout: float = 5.0, breaker: Optional[CircuitBreaker] = None, spool_path: Optional[str] = None,
+                 replay_interval: float = 10.0, replay_batch: int = 500):
         self.connection_string = connection_string or os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
         self.database_name = database_name
+        self.buffered = buffered
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.ordered = ordered
+        self.write_concern = write_concern
+        self.connect_timeout = connect_timeout
+        self.reconnect_interval = reconnect_interval
+        self.write_timeout = write_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.spool = LogSpool(spool_path) if spool_path else None
+        self.replay_interval = replay_interval
+        self.replay_batch = replay_batch
+        self.replayed = 0
+        self.connect_attempts = 0
         self.client = None
         self.db = None
-        self._connect()
+        self.dropped = 0
+        self.flushed = 0
+        self._buffer = queue.Queue(maxsize=max_buffer)
+        self._overflow_log = LogThrottle()
+        self._stop = threading.Event()
+        self._flusher = None
+        self._connector = None
+        self._replayer = None
+        
+        if background_connect:
+            self._connector = threading.Thread(target=self._connect_loop, name="mongo-connect", daemon=True)
+            self._connector.start()
+        else:
+            self._connect()
+        
+        if self.buffered:
+            self._flusher = threading.Thread(target=self._flush_loop, name="mongo-flusher", daemon=True)
+            self._flusher.start()
+        
+        if self.spool:
+            self._replayer = threading.Thread(target=self._replay_loop, name="mongo-replay", daemon=True)
+            self._replayer.start()
     
-    def _connect(self):
+    def _connect(self) -> bool:
+        self.connect_attempts += 1
+        client = None
         try:
-            self.client = MongoClient(self.connection_string)
-            self.db = self.client[self.database_name]
-            self.client.admin.command('ping')
-            print(f"Connected to MongoDB: {self.database_name}")
+            from pymongo import MongoClient
+            
+            timeout_ms = int(self.connect_timeout * 1000)
+            client = MongoClient(
+                self.connection_string,
+                serverSelectionTimeoutMS=timeout_ms,
+                connectTimeoutMS=timeout_ms,
+                socketTimeoutMS=int(self.write_timeout * 1000)
+            )
+            client.admin.command('ping')
+            # publish only once the ping succeeded so is_connected never sees a half-made client
+            self.db = client[self.database_name]
+            self.client = client
+            log.info("connected to MongoDB", database=self.database_name, attempts=self.connect_attempts)
+            return True
         except Exception as e:
-            print(f"MongoDB connection failed: {e}")
-            self.client = None
-            self.db = None
+            log.warning("MongoDB connection failed", error=str(e), attempt=self.connect_attempts)
+            if client is not None:
+                client.close()
+            return False
+    
+    def _connect_loop(self):
+        while not self._stop.is_set():
+            if self._connect():
+                return
+            self._stop.wait(self.reconnect_interval)
     
     def is_connected(self) -> bool:
         return self.client is not None and self.db is not None
     
+    def _logs_collection(self):
+        collection = self.db.processing_logs
+        if self.write_concern:
+            from pymongo import WriteConcern
+            collection = collection.with_options(write_concern=WriteConcern(**self.write_concern))
+        return collection
+    
+    def _build_log_entry(self, endpoint: str, content_data: Dict[str, Any], classification: Dict[str, bool], response_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "_id": ObjectId(),
+            "timestamp": datetime.utcnow(),
+            "endpoint": endpoint,
+            "content_preview": content_data.get("preview", ""),
+            "content_length": content_data.get("length", 0),
+            "classification": classification,
+            "processing_success": response_data.get("status") != "error",
+            "has_s3_storage": "s3_storage" in response_data,
+            "has_latex_conversion": "latex_conversion" in response_data
+        }
+    
+    def _enqueue(self, log_entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """buffer entries, spooling whatever does not fit; returns the entries kept"""
+        for index, entry in enumerate(log_entries):
+            try:
+                self._buffer.put_nowait(entry)
+            except queue.Full:
+                overflow = log_entries[index:]
+                spooled = self._spool(overflow)
+                suppressed = self._overflow_log.ready()
+                if suppressed is not None:
+                    log.warning("MongoDB log buffer full, " + ("spooling" if spooled else "dropping") + " entries",
+                                entries=len(overflow), dropped=self.dropped, earlier_warnings_suppressed=suppressed)
+                return log_entries if spooled else log_entries[:index]
+        return log_entries
+    
+    def _spool(self, entries: List[Dict[str, Any]]) -> bool:
+        if self.spool is None:
+            self.dropped += len(entries)
+            return False
+        try:
+            self.spool.append(entries)
+            return True
+        except OSError as e:
+            self.dropped += len(entries)
+            log.error("MongoDB spool write failed, dropping entries", entries=len(entries), error=str(e))
+            return False
+    
+    def _write(self, entries: List[Dict[str, Any]]) -> bool:
+        """insert entries, spooling them instead while Mongo is failing
+
+        returns True when the entries were stored in Mongo or the spool
+        """
+        if self.is_connected() and self.breaker.allow():
+            try:
+                with time_stage("mongo_insert"):
+                    if len(entries) == 1:
+                        self._logs_collection().insert_one(entries[0])
+                    else:
+                        self._logs_collection().insert_many(entries, ordered=self.ordered)
+                self.breaker.record_success()
+                return True
+            except Exception as e:
+                if _only_duplicates(e):
+                    self.breaker.record_success()
+                    return True
+                self.breaker.record_failure()
+                log.warning("MongoDB write failed, spooling entries", entries=len(entries), error=str(e),
+                            breaker=self.breaker.state)
+        return self._spool(entries)
+    
     def log_processing_request(self, endpoint: str, content_data: Dict[str, Any], classification: Dict[str, bool], response_data: Dict[str, Any]) -> Optional[str]:
-        if not self.is_connected():
+        try:
+            log_entry = self._build_log_entry(endpoint, content_data, classification, response_data)
+            if self.buffered:
+                return str(log_entry["_id"]) if self._enqueue([log_entry]) else None
+            return str(log_entry["_id"]) if self._write([log_entry]) else None
+        except Exception as e:
+            log.error("MongoDB logging failed", error=str(e))
             return None
+    
+    def log_processing_requests(self, endpoint: str, items: List[Dict[str, Any]]) -> List[str]:
+        """log many requests with a single insert_many
+        
+        each item holds content_data, classification and response_data
+        """
+        if not items:
+            return []
         
         try:
-            log_entry = {
-                "timestamp": datetime.utcnow(),
-                "endpoint": endpoint,
-                "content_preview": content_data.get("preview", ""),
-                "content_length": content_data.get("length", 0),
-                "classification": classification,
-                "processing_success": response_data.get("status") != "error",
-                "has_s3_storage": "s3_storage" in response_data,
-                "has_latex_conversion": "latex_conversion" in response_data
-            }
-            
-            result = self.db.processing_logs.insert_one(log_entry)
-            return str(result.inserted_id)
+            log_entries = [
+                self._build_log_entry(endpoint, item["content_data"], item["classification"], item["response_data"])
+                for item in items
+            ]
+            if self.buffered and len(log_entries) < self.flush_size:
+                return [str(entry["_id"]) for entry in self._enqueue(log_entries)]
+            # a batch that would fill a flush on its own is written as one insert_many
+            return [str(entry["_id"]) for entry in log_entries] if self._write(log_entries) else []
         except Exception as e:
-            print(f"MongoDB logging failed: {e}")
-            return None
+            log.error("MongoDB batch logging failed", error=str(e))
+            return []
+    
+    def _drain(self, limit: int) -> List[Dict[str, Any]]:
+        entries = []
+        while len(entries) < limit:
+            try:
+                entries.append(self._buffer.get_nowait())
+            except queue.Empty:
+                break
+        return entries
+    
+    def flush(self) -> int:
+        """write everything currently buffered; returns the number of entries stored or spooled"""
+        written = 0
+        while True:
+            entries = self._drain(self.flush_size)
+            if not entries:
+                return written
+            if self._write(entries):
+                written += len(entries)
+                self.flushed += len(entries)
+    
+    def replay(self) -> int:
+        """write spooled entries back to Mongo; returns how many were replayed"""
+        path = self.spool.take() if self.spool else None
+        if path is None:
+            return 0
+        
+        replayed = 0
+        for batch in self.spool.read_batches(path, self.replay_batch):
+            if self._stop.is_set() or not self.breaker.allow():
+                return replayed
+            try:
+                with time_stage("mongo_replay"):
+                    self._logs_collection().insert_many(batch, ordered=False)
+            except Exception as e:
+                if not _only_duplicates(e):
+                    self.breaker.record_failure()
+                    log.warning("MongoDB spool replay failed", replayed=replayed, error=str(e))
+                    return replayed
+            self.breaker.record_success()
+            replayed += len(batch)
+            self.replayed += len(batch)
+        
+        self.spool.done(path)
+        log.info("replayed spooled MongoDB entries", entries=replayed)
+        return replayed
+    
+    def _replay_loop(self):
+        while not self._stop.wait(self.replay_interval):
+            if self.is_connected():
+                try:
+                    self.replay()
+                except Exception as e:
+                    log.error("MongoDB spool replay crashed", error=str(e))
+    
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            deadline = time.monotonic() + self.flush_interval
+            while self._buffer.qsize() < self.flush_size and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._stop.wait(min(remaining, 0.05))
+            if self.is_connected():
+                self.flush()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.is_connected(),
+            "connect_attempts": self.connect_attempts,
+            "buffered": self.buffered,
+            "pending": self._buffer.qsize(),
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "breaker": self.breaker.stats(),
+            "spooled": self.spool.spooled if self.spool else 0,
+            "spool_bytes": self.spool.pending_bytes() if self.spool else 0,
+            "replayed": self.replayed
+        }
+    
+    def is_degraded(self) -> bool:
+        """connected, but writes are currently failing over to the spool"""
+        return self.breaker.state == OPEN
     
     def close(self):
+        self._stop.set()
+        if self._connector is not None:
+            self._connector.join()
+            self._connector = None
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        if self._replayer is not None:
+            self._replayer.join()
+            self._replayer = None
+        if self.buffered:
+            # spools what is left when Mongo never connected
+            self.flush()
         if self.client:
-            self.client.close()
\ No newline at end of file
+            self.client.close()
@@ -0,0 +1,109 @@
+import base64
+from typing import AsyncIterator, Tuple
+
+from fastapi import Request, UploadFile
+from fastapi.exceptions import RequestValidationError
+from starlette.formparsers import MultiPartParser
+from pydantic import BaseModel, ValidationError
+
+from metrics import time_stage
+from serialization import loads
+
+CHUNK_SIZE = 64 * 1024
+
+# room for the multipart boundaries, part headers and the "type" field
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class ScreenshotData(BaseModel):
+    image: str
+    type: str
+
+
+class ImageTooLarge(Exception):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Image exceeds the {max_bytes} byte upload limit")
+        self.max_bytes = max_bytes
+
+
+async def _read_limited(chunks: AsyncIterator[bytes], max_bytes: int) -> bytes:
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer += chunk
+        if len(buffer) > max_bytes:
+            raise ImageTooLarge(max_bytes)
+    return bytes(buffer)
+
+
+async def _limited_stream(chunks: AsyncIterator[bytes], max_bytes: int, limit: int) -> AsyncIterator[bytes]:
+    """pass chunks through, stopping once more than limit bytes arrived"""
+    received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if received > limit:
+            raise ImageTooLarge(max_bytes)
+        yield chunk
+
+
+async def _upload_chunks(upload: UploadFile) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await upload.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def read_image_request(request: Request, max_bytes: int) -> Tuple[bytes, str, int]:
+    """read a /process-image body into (image bytes, type, payload length)
+
+    Accepts the original JSON body with a base64 image, a raw image/* (or
+    application/octet-stream) body with the type in the ?type= query
+    parameter, or multipart/form-data with an "image" file field and an
+    optional "type" field. Bodies are read in chunks and rejected as soon as
+    they pass max_bytes.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    content_length = request.headers.get("content-length")
+
+    if content_type.startswith("image/") or content_type == "application/octet-stream":
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+            raise ImageTooLarge(max_bytes)
+        image_bytes = await _read_limited(request.stream(), max_bytes)
+        return image_bytes, request.query_params.get("type", "math"), len(image_bytes)
+
+    if content_type == "multipart/form-data":
+        limit = max_bytes + MULTIPART_OVERHEAD
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            raise ImageTooLarge(max_bytes)
+        # parse from a capped stream: request.form() would spool a chunked upload of any size to disk first
+        parser = MultiPartParser(request.headers, _limited_stream(request.stream(), max_bytes, limit))
+        try:
+            form = await parser.parse()
+        except ImageTooLarge:
+            # close the parts spooled so far; older Starlette only does this for its own parse errors
+            for file in getattr(parser, "_files_to_close_on_error", ()):
+                file.close()
+            raise
+        try:
+            upload = form.get("image") or form.get("file")
+            if upload is None or isinstance(upload, str):
+                raise RequestValidationError([{"loc": ("body", "image"), "msg": "image file is required", "type": "value_error.missing"}])
+            image_bytes = await _read_limited(_upload_chunks(upload), max_bytes)
+        finally:
+            await form.close()
+        return image_bytes, str(form.get("type", "math")), len(image_bytes)
+
+    # base64 inflates by 4/3, so the encoded body may be that much larger
+    encoded_limit = max_bytes * 4 // 3 + 1024
+    if content_length and content_length.isdigit() and int(content_length) > encoded_limit:
+        raise ImageTooLarge(max_bytes)
+    body = await _read_limited(request.stream(), encoded_limit)
+    try:
+        data = ScreenshotData(**loads(body))
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    except (ValueError, TypeError) as e:
+        raise RequestValidationError([{"loc": ("body",), "msg": str(e), "type": "value_error.jsondecode"}])
+    with time_stage("base64_decode"):
+        image_bytes = base64.b64decode(data.image)
+    return image_bytes, data.type, len(data.image)
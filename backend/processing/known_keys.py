@@ -0,0 +1,150 @@
+import hashlib
+import math
+import os
+import threading
+from typing import Callable, Optional
+
+from app_logging import get_logger
+
+log = get_logger("s3")
+
+
+class BloomFilter:
+    """fixed-size bloom filter over strings, persisted as a raw bit array"""
+
+    def __init__(self, capacity: int = 1000000, error_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.sha256(item.encode("utf-8")).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:16], "big") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def load(self, path: str) -> bool:
+        """read bits saved by save(); False when missing or sized for another capacity"""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return False
+        if len(data) != len(self.bits):
+            return False
+        self.bits[:] = data
+        return True
+
+    def save(self, path: str, data: Optional[bytes] = None):
+        """write the bits, or data: a bytes(bits) snapshot taken earlier"""
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(self.bits if data is None else data)
+        os.replace(temp_path, path)
+
+
+class KnownKeys:
+    """object keys already stored in the bucket
+
+    Keys written by this process are kept in a bounded in-memory set. All
+    keys also go into a bloom filter saved to path every save_every
+    additions and on close, so the index survives restarts; the bits are
+    copied under the lock and written to disk outside it, by the thread
+    whose add() made the save due. A bloom hit can
+    be a false positive, so contains() asks confirm(key) (a HEAD request)
+    before trusting it.
+    """
+
+    def __init__(self, path: Optional[str] = None, capacity: int = 1000000, error_rate: float = 0.001,
+                 memory_size: int = 100000, save_every: int = 100):
+        self.path = path
+        self.memory_size = memory_size
+        self.save_every = save_every
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.memory = set()
+        self.memory_hits = 0
+        self.bloom_hits = 0
+        self.false_positives = 0
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        if path:
+            self.bloom.load(path)
+
+    def known_locally(self, key: str) -> bool:
+        """in the in-memory set; no I/O"""
+        with self._lock:
+            if key in self.memory:
+                self.memory_hits += 1
+                return True
+        return False
+
+    def contains(self, key: str, confirm: Callable[[str], bool]) -> bool:
+        if self.known_locally(key):
+            return True
+        with self._lock:
+            maybe = key in self.bloom
+        if not maybe:
+            return False
+        if confirm(key):
+            with self._lock:
+                self.bloom_hits += 1
+                self._remember(key)
+            return True
+        with self._lock:
+            self.false_positives += 1
+        return False
+
+    def _remember(self, key: str):
+        if len(self.memory) >= self.memory_size:
+            self.memory.clear()
+        self.memory.add(key)
+
+    def add(self, key: str):
+        with self._lock:
+            self._remember(key)
+            self.bloom.add(key)
+            self._unsaved += 1
+            due = self.path and self._unsaved >= self.save_every
+        if due:
+            # another thread already writing the file picks these additions up next time
+            self._save(wait=False)
+
+    def _save(self, wait: bool = True):
+        if not self._save_lock.acquire(blocking=wait):
+            return
+        try:
+            with self._lock:
+                if not self._unsaved:
+                    return
+                data = bytes(self.bloom.bits)
+                unsaved = self._unsaved
+                self._unsaved = 0
+            try:
+                self.bloom.save(self.path, data)
+            except OSError as e:
+                with self._lock:
+                    self._unsaved += unsaved
+                log.warning("known keys index save failed", path=self.path, error=str(e))
+        finally:
+            self._save_lock.release()
+
+    def close(self):
+        if self.path:
+            self._save()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_memory": len(self.memory),
+                "memory_hits": self.memory_hits,
+                "bloom_hits": self.bloom_hits,
+                "false_positives": self.false_positives
+            }
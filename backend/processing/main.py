@@ -1,54 +1,367 @@
-from fastapi import FastAPI, File, UploadFile
+from fastapi import FastAPI, File, Request, UploadFile
+from fastapi.responses import Response
 from pydantic import BaseModel
 from classification.classify import *
 from conversion.latex_conv import *
-from s3_storage import S3Storage
-from db_storage import MongoDBStorage
-import google.generativeai as genai
+from cache import TTLCache, content_hash
+from conversion.latex_cache import LatexCache
+from conversion.preprocess import preprocess_image
+from conversion.date_parse import parse_date_locally
+from conversion.text_latex import text_to_latex
+from model_calls import ModelCallExecutor, SingleFlight
+from s3_uploader import BackgroundUploader
+from image_input import ImageTooLarge, read_image_request
+import metrics
+from metrics import observe_classify, reset_request_timing, server_timing_header, start_request_timing, time_stage
+from profiling import RequestProfiler
+from serialization import dumps
+from app_logging import configure_logging, content_fields, get_logger, logging_stats
 import os
-import base64
 from PIL import Image
 import io
-from datetime import datetime
+import asyncio
+import atexit
+import contextlib
+import functools
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, List, Optional
 import re
 
-app = FastAPI()
+# JSON log lines written from a background thread; clipboard content is
+# truncated (or hashed, or omitted) per LOG_CONTENT before it is logged
+configure_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    fmt=os.getenv("LOG_FORMAT", "json"),
+    sample_rate=float(os.getenv("LOG_SAMPLE_RATE", "1.0")),
+    content_mode=os.getenv("LOG_CONTENT", "truncate"),
+    content_max_chars=int(os.getenv("LOG_CONTENT_MAX_CHARS", "80"))
+)
+log = get_logger("api")
 
+# the Gemini SDK is imported and configured on first use (load_genai)
 GENAI_API_KEY = "-Retracted-"
-if GENAI_API_KEY:
-    genai.configure(api_key=GENAI_API_KEY)
+
+# Gemini calls run on their own bounded pool so they never block the event loop
+GENAI_MAX_CONCURRENCY = int(os.getenv("GENAI_MAX_CONCURRENCY", "4"))
+GENAI_TIMEOUT = float(os.getenv("GENAI_TIMEOUT", "60"))
+
+model_executor = ModelCallExecutor(max_concurrency=GENAI_MAX_CONCURRENCY, timeout=GENAI_TIMEOUT)
+# module-level singletons outlive a lifespan cycle (tests enter it repeatedly),
+# so they are closed at exit rather than in stop_services
+atexit.register(model_executor.shutdown, wait=False)
+
+# identical screenshots / calendar texts arriving together (e.g. client retries
+# after a timeout) share one in-flight Gemini call
+latex_flight = SingleFlight()
+date_flight = SingleFlight()
 
 S3_BUCKET_NAME = "smart-clipboard-downloads"
 AWS_ACCESS_KEY_ID = "-retracted-"
 AWS_SECRET_ACCESS_KEY = "-retracted-"
 AWS_REGION = "us-east-1"
 
+S3_CONNECT_TIMEOUT = float(os.getenv("S3_CONNECT_TIMEOUT", "2"))
+S3_READ_TIMEOUT = float(os.getenv("S3_READ_TIMEOUT", "10"))
+S3_RECONNECT_INTERVAL = float(os.getenv("S3_RECONNECT_INTERVAL", "5"))
+
+# content-addressed keys hash the payload, so repeated results map to one object;
+# the known-keys index (memory set + bloom filter file) skips PUTs for stored content
+S3_CONTENT_ADDRESSED_KEYS = os.getenv("S3_CONTENT_ADDRESSED_KEYS", "false").lower() == "true"
+S3_KNOWN_KEYS_PATH = os.getenv("S3_KNOWN_KEYS_PATH", "s3_known_keys.bloom")
+S3_KNOWN_KEYS_CAPACITY = int(os.getenv("S3_KNOWN_KEYS_CAPACITY", "1000000"))
+
+# objects of one result upload concurrently over a shared connection pool; large
+# bodies go multipart. Compression is opt-in: gzip Content-Encoding for JSON/text
+# and optimized PNG or lossless WebP for images
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "32"))
+S3_PUT_CONCURRENCY = int(os.getenv("S3_PUT_CONCURRENCY", "4"))
+S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", str(8 * 1024 * 1024)))
+S3_GZIP = os.getenv("S3_GZIP", "false").lower() == "true"
+S3_GZIP_MIN_BYTES = int(os.getenv("S3_GZIP_MIN_BYTES", "1024"))
+S3_IMAGE_FORMAT = os.getenv("S3_IMAGE_FORMAT") or None
+
+MONGO_WRITE_CONCERN = os.getenv("MONGO_WRITE_CONCERN")
+MONGO_CONNECT_TIMEOUT = float(os.getenv("MONGO_CONNECT_TIMEOUT", "2"))
+MONGO_RECONNECT_INTERVAL = float(os.getenv("MONGO_RECONNECT_INTERVAL", "5"))
+
+# while Mongo writes fail, log entries go to a local JSON lines spool that is
+# replayed once the circuit breaker lets writes through again
+MONGO_WRITE_TIMEOUT = float(os.getenv("MONGO_WRITE_TIMEOUT", "5"))
+MONGO_BREAKER_THRESHOLD = int(os.getenv("MONGO_BREAKER_THRESHOLD", "3"))
+MONGO_BREAKER_RESET = float(os.getenv("MONGO_BREAKER_RESET", "30"))
+MONGO_SPOOL_PATH = os.getenv("MONGO_SPOOL_PATH", "mongo_spool.jsonl")
+MONGO_REPLAY_INTERVAL = float(os.getenv("MONGO_REPLAY_INTERVAL", "10"))
+
+# services that must be up before /readyz reports ready
+READINESS_REQUIRES = [name.strip() for name in os.getenv("READINESS_REQUIRES", "s3,mongo").split(",") if name.strip()]
+
+# echo the request text back as "original_text"; the Java client reads it for
+# address handling, so only turn this off for clients that do not need it
+RESPONSE_ORIGINAL_TEXT = os.getenv("RESPONSE_ORIGINAL_TEXT", "true").lower() == "true"
+
+# created by the lifespan hook; boto3 and pymongo load in the background, so
+# these stay None (and S3 uploads / Mongo logging are skipped) until ready
 s3_storage = None
-if S3_BUCKET_NAME:
-    s3_storage = S3Storage(
+s3_uploader = None
+mongo_storage = None
+service_status = {"s3": "disabled" if not S3_BUCKET_NAME else "starting"}
+s3_stop = threading.Event()
+
+def build_s3_storage():
+    from s3_storage import S3Storage
+    
+    known_keys = None
+    if S3_CONTENT_ADDRESSED_KEYS:
+        from known_keys import KnownKeys
+        known_keys = KnownKeys(S3_KNOWN_KEYS_PATH or None, capacity=S3_KNOWN_KEYS_CAPACITY)
+    
+    return S3Storage(
         bucket_name=S3_BUCKET_NAME,
         aws_access_key_id=AWS_ACCESS_KEY_ID,
         aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-        region_name=AWS_REGION
+        region_name=AWS_REGION,
+        connect_timeout=S3_CONNECT_TIMEOUT,
+        read_timeout=S3_READ_TIMEOUT,
+        content_addressed=S3_CONTENT_ADDRESSED_KEYS,
+        known_keys=known_keys,
+        max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+        upload_concurrency=S3_PUT_CONCURRENCY,
+        multipart_threshold=S3_MULTIPART_THRESHOLD,
+        gzip_text=S3_GZIP,
+        gzip_min_bytes=S3_GZIP_MIN_BYTES,
+        image_format=S3_IMAGE_FORMAT
     )
 
-mongo_storage = MongoDBStorage()
+def connect_s3():
+    """build the S3 client and check the bucket; runs on a background thread
+
+    Uploads are enabled as soon as the client exists. Until head_bucket
+    succeeds (it also fails without s3:ListBucket or on a network blip) the
+    status is "unverified" and the check is retried every
+    S3_RECONNECT_INTERVAL seconds, as is building the client itself.
+    """
+    global s3_storage, s3_uploader
+    storage = None
+    while not s3_stop.is_set():
+        try:
+            if storage is None:
+                storage = build_s3_storage()
+            check = storage.check_bucket()
+            if s3_uploader is None and not s3_stop.is_set():
+                # uploader first: handlers test s3_storage, then use s3_uploader
+                s3_uploader = BackgroundUploader(
+                    storage,
+                    max_queue=int(os.getenv("S3_UPLOAD_QUEUE_SIZE", "1000")),
+                    workers=int(os.getenv("S3_UPLOAD_WORKERS", "4")),
+                    max_retries=int(os.getenv("S3_UPLOAD_RETRIES", "3"))
+                )
+                s3_storage = storage
+            if check["success"]:
+                service_status["s3"] = "ready"
+                return
+            if service_status["s3"] != "unverified":
+                log.warning("S3 bucket check failed; uploads will still be attempted", error=check["error"])
+            service_status["s3"] = "unverified"
+        except Exception as e:
+            service_status["s3"] = "failed"
+            log.error("S3 client setup failed", error=str(e))
+        s3_stop.wait(S3_RECONNECT_INTERVAL)
+
+def start_services():
+    global mongo_storage
+    s3_stop.clear()
+    service_status["s3"] = "disabled" if not S3_BUCKET_NAME else "starting"
+    from circuit_breaker import CircuitBreaker
+    from db_storage import MongoDBStorage
+    
+    mongo_storage = MongoDBStorage(
+        buffered=os.getenv("MONGO_BUFFERED", "true").lower() == "true",
+        flush_size=int(os.getenv("MONGO_FLUSH_SIZE", "500")),
+        flush_interval=float(os.getenv("MONGO_FLUSH_INTERVAL", "1.0")),
+        ordered=os.getenv("MONGO_ORDERED_WRITES", "false").lower() == "true",
+        write_concern={"w": int(MONGO_WRITE_CONCERN) if MONGO_WRITE_CONCERN.isdigit() else MONGO_WRITE_CONCERN} if MONGO_WRITE_CONCERN else None,
+        connect_timeout=MONGO_CONNECT_TIMEOUT,
+        background_connect=True,
+        reconnect_interval=MONGO_RECONNECT_INTERVAL,
+        write_timeout=MONGO_WRITE_TIMEOUT,
+        breaker=CircuitBreaker(failure_threshold=MONGO_BREAKER_THRESHOLD, reset_timeout=MONGO_BREAKER_RESET),
+        spool_path=MONGO_SPOOL_PATH or None,
+        replay_interval=MONGO_REPLAY_INTERVAL
+    )
+    if S3_BUCKET_NAME:
+        threading.Thread(target=connect_s3, name="s3-connect", daemon=True).start()
+
+def stop_services():
+    global s3_storage, s3_uploader, mongo_storage
+    s3_stop.set()
+    # unpublish first so requests still finishing skip storage instead of using it closed
+    storage, uploader, mongo = s3_storage, s3_uploader, mongo_storage
+    s3_storage = s3_uploader = mongo_storage = None
+    if uploader:
+        uploader.shutdown(timeout=float(os.getenv("S3_UPLOAD_DRAIN_TIMEOUT", "30")))
+    if storage:
+        storage.close()
+    if mongo:
+        mongo.close()
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_services()
+    yield
+    # draining uploads and Mongo writes blocks; keep the loop free for in-flight requests
+    await asyncio.get_running_loop().run_in_executor(None, stop_services)
+
+class JSONBytesResponse(Response):
+    """JSON rendered with the shared orjson dumps (FastAPI deprecated ORJSONResponse)"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+app = FastAPI(lifespan=lifespan, default_response_class=JSONBytesResponse)
+
+# /process results keyed by a hash of the clipboard text; identical text seen
+# again within PROCESS_DEDUP_WINDOW seconds is treated as a duplicate event
+PROCESS_CACHE_SIZE = int(os.getenv("PROCESS_CACHE_SIZE", "4096"))
+PROCESS_CACHE_TTL = float(os.getenv("PROCESS_CACHE_TTL", "3600"))
+PROCESS_DEDUP_WINDOW = float(os.getenv("PROCESS_DEDUP_WINDOW", "10"))
+PROCESS_BATCH_MAX_ITEMS = int(os.getenv("PROCESS_BATCH_MAX_ITEMS", "10000"))
+
+process_cache = TTLCache(max_size=PROCESS_CACHE_SIZE, ttl=PROCESS_CACHE_TTL)
+process_stats = {"duplicates_suppressed": 0}
+
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(20 * 1024 * 1024)))
+
+# screenshots are trimmed, grayscaled and downscaled before transcription
+IMAGE_PREPROCESS = os.getenv("IMAGE_PREPROCESS", "true").lower() == "true"
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "1600"))
+IMAGE_GRAYSCALE = os.getenv("IMAGE_GRAYSCALE", "true").lower() == "true"
+IMAGE_TRIM = os.getenv("IMAGE_TRIM", "true").lower() == "true"
+
+preprocess_stats = {"images": 0, "bytes_before": 0, "bytes_after": 0}
+
+# screenshot -> LaTeX results, in memory and on disk across restarts
+latex_cache = LatexCache(
+    path=os.getenv("LATEX_CACHE_PATH", "latex_cache.sqlite3"),
+    memory_size=int(os.getenv("LATEX_CACHE_MEMORY_SIZE", "256")),
+    use_phash=os.getenv("LATEX_CACHE_PHASH", "false").lower() == "true",
+    phash_distance=int(os.getenv("LATEX_CACHE_PHASH_DISTANCE", "0"))
+)
+atexit.register(latex_cache.close)
+
+# zone for calendar times that do not name one (e.g. "America/New_York")
+CALENDAR_TIMEZONE = os.getenv("CALENDAR_TIMEZONE", "UTC")
+
+# format_date results keyed by normalized text (plus today's date when relative)
+date_cache = TTLCache(
+    max_size=int(os.getenv("DATE_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("DATE_CACHE_TTL", "21600"))
+)
+
+# Server-Timing response header with the per-stage breakdown of each request
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() == "true"
+
+# sampled requests get a folded-stack profile written to PROFILE_DIR
+request_profiler = RequestProfiler(
+    sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+    directory=os.getenv("PROFILE_DIR", "profiles"),
+    interval=float(os.getenv("PROFILE_INTERVAL", "0.005"))
+)
 
 class ClipboardData(BaseModel):
     text: str
 
-class ScreenshotData(BaseModel):
-    image: str
-    type: str
+class ClipboardBatchData(BaseModel):
+    texts: List[str]
 
 class CalendarEventData(BaseModel):
     text: str
     description: str
 
+app.add_middleware(metrics.RequestMetricsMiddleware)
+
+async def add_server_timing(request: Request, call_next):
+    """classify/llm/s3/mongo breakdown of this request in a Server-Timing header"""
+    started = time.perf_counter()
+    stages, token = start_request_timing()
+    try:
+        response = await call_next(request)
+    finally:
+        reset_request_timing(token)
+    response.headers["Server-Timing"] = server_timing_header(stages, time.perf_counter() - started)
+    return response
+
+async def sample_profile(request: Request, call_next):
+    """profile a PROFILE_SAMPLE_RATE share of requests; the file name is returned in X-Profile"""
+    profiler = request_profiler.maybe_start()
+    if profiler is None:
+        return await call_next(request)
+    try:
+        response = await call_next(request)
+    finally:
+        loop = asyncio.get_running_loop()
+        filename = await loop.run_in_executor(None, request_profiler.finish, profiler, f"{request.method} {request.url.path}")
+    if filename:
+        response.headers["X-Profile"] = filename
+    return response
+
+# opt-in layers are only installed when enabled; each one adds a per-request cost even as a pass-through
+if SERVER_TIMING:
+    app.middleware("http")(add_server_timing)
+if request_profiler.sample_rate > 0:
+    app.middleware("http")(sample_profile)
+
+def convert_typed_math(text: str, classification: dict) -> Optional[str]:
+    """local LaTeX for typed math; text also classified as a date or address is not converted"""
+    if classification["date"] or classification["address"]:
+        return None
+    return text_to_latex(text)
+
+def with_original_text(response: dict, text: str) -> dict:
+    """add the request text to a response unless RESPONSE_ORIGINAL_TEXT is off"""
+    if RESPONSE_ORIGINAL_TEXT:
+        response["original_text"] = text
+    return response
+
+def error_response(endpoint: str, response: dict) -> dict:
+    """count an error result that is returned with status 200"""
+    metrics.REQUEST_ERRORS.labels(endpoint=endpoint).inc()
+    return response
+
 @app.get("/")
 async def welcome():
     return {"message": "Welcome to ClipSmart Classification API!"}
 
+@app.get("/healthz")
+async def healthz():
+    """liveness: the process is serving requests"""
+    return {"status": "ok"}
+
+def mongo_status() -> str:
+    if mongo_storage is None:
+        return "disabled"
+    if not mongo_storage.is_connected():
+        return "connecting"
+    # writes are spooling locally; requests are unaffected, so still ready
+    return "degraded" if mongo_storage.is_degraded() else "ready"
+
+def readiness() -> dict:
+    services = {
+        "s3": service_status["s3"],
+        "mongo": mongo_status()
+    }
+    # "unverified": the client works but head_bucket failed; uploads are attempted anyway
+    ready = all(services.get(name) in ("ready", "unverified", "degraded", "disabled") for name in READINESS_REQUIRES)
+    return {"status": "ready" if ready else "starting", "services": services}
+
+@app.get("/readyz")
+async def readyz():
+    """readiness: the services in READINESS_REQUIRES are connected"""
+    result = readiness()
+    return JSONBytesResponse(result, status_code=200 if result["status"] == "ready" else 503)
+
 def process_text(text: str) -> str:
     """process text like SmartInterface.java"""
     return (text
@@ -56,6 +369,10 @@ def process_text(text: str) -> str:
         .replace("\\n", "\n")
         .replace("\\\"", "\""))
 
+def build_preview(text: str) -> str:
+    """first 100 characters of text for responses"""
+    return text[:100] + "..." if len(text) > 100 else text
+
 def generate_ics(summary: str, start_date: str, end_date: str, description: str = "") -> str:
     """generate ICS for calendar event"""
     
@@ -78,9 +395,10 @@ END:VCALENDAR"""
     
     return ics_content
 
-def format_date(date_text: str, api_key: str) -> dict:
+def format_date(date_text: str, api_key: str, timeout: float = None) -> dict:
     """extract date/time info with Gemini"""
     try:
+        genai = load_genai(api_key)
         model = genai.GenerativeModel('gemini-1.5-flash')
         
         prompt = f"""
@@ -105,7 +423,9 @@ def format_date(date_text: str, api_key: str) -> dict:
         - Convert all times to 24-hour format
         """
         
-        response = model.generate_content(prompt)
+        request_options = {"timeout": timeout} if timeout else None
+        with time_stage("gemini"):
+            response = model.generate_content(prompt, request_options=request_options)
         response_text = response.text.strip()
         
         if '```json' in response_text:
@@ -121,7 +441,7 @@ def format_date(date_text: str, api_key: str) -> dict:
         return result
         
     except Exception as e:
-        print(f"Error formatting date with Gemini: {e}")
+        log.error("date extraction with Gemini failed", error=str(e))
         return {
             "start_date": None,
             "end_date": None,
@@ -130,57 +450,142 @@ def format_date(date_text: str, api_key: str) -> dict:
             "error": str(e)
         }
 
+RELATIVE_DATE_PATTERN = re.compile(
+    r'\b(today|tonight|tomorrow|yesterday|next|last|this|ago|in\s+\d+|weekend|'
+    r'mon(day)?|tue(s|sday)?|wed(nesday)?|thu(rs|rsday)?|fri(day)?|sat(urday)?|sun(day)?)\b'
+)
+YEAR_PATTERN = re.compile(r'\b\d{4}\b')
+
+def normalize_date_text(date_text: str) -> str:
+    """canonical form of calendar text so trivial variants share a cache entry"""
+    text = re.sub(r'\s+', ' ', date_text.strip().lower())
+    text = re.sub(r'(\d)\s*(a\.?m\.?|p\.?m\.?)(?=\W|$)', lambda m: m.group(1) + m.group(2).replace('.', ''), text)
+    return text.rstrip('.!?')
+
+def date_cache_key(date_text: str) -> str:
+    """cache key for format_date; texts that resolve relative to now include today's date"""
+    normalized = normalize_date_text(date_text)
+    if RELATIVE_DATE_PATTERN.search(normalized) or not YEAR_PATTERN.search(normalized):
+        return f"{date.today().isoformat()}|{normalized}"
+    return normalized
+
+async def cached_format_date(date_text: str, api_key: str) -> dict:
+    """format_date behind date_cache; failed extractions are not cached"""
+    key = date_cache_key(date_text)
+    cached = date_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+    
+    result = await date_flight.do(key, functools.partial(model_executor.run, format_date, date_text, api_key, GENAI_TIMEOUT))
+    if "error" not in result:
+        date_cache.set(key, dict(result))
+    # coalesced callers share the result dict
+    return dict(result)
+
+async def transcribe_screenshot(image_bytes: bytes, image) -> tuple:
+    """preprocess a screenshot, transcribe it with Gemini and cache the LaTeX
+
+    returns the LaTeX and the preprocessing stats (None when disabled)
+    """
+    preprocessing = None
+    model_input = image_bytes
+    if IMAGE_PREPROCESS:
+        loop = asyncio.get_running_loop()
+        with time_stage("preprocess"):
+            model_input, preprocessing = await loop.run_in_executor(None, functools.partial(
+                preprocess_image,
+                image_bytes,
+                max_dimension=IMAGE_MAX_DIMENSION,
+                grayscale=IMAGE_GRAYSCALE,
+                trim=IMAGE_TRIM
+            ))
+        preprocess_stats["images"] += 1
+        preprocess_stats["bytes_before"] += preprocessing["bytes_before"]
+        preprocess_stats["bytes_after"] += preprocessing["bytes_after"]
+        metrics.observe_preprocessing(preprocessing)
+    
+    log.debug("transcribing screenshot with Gemini")
+    latex_result = await model_executor.run(image_to_latex, model_input, GENAI_API_KEY, GENAI_TIMEOUT)
+    if latex_result and not latex_result.startswith("An error occurred"):
+        await asyncio.get_running_loop().run_in_executor(None, latex_cache.store, image_bytes, latex_result, image)
+    return latex_result, preprocessing
+
 @app.post("/process")
 async def process_clipboard(data: ClipboardData):
-    print(f"Received clipboard text: {data.text}")
+    log.info("clipboard text received", **content_fields(data.text))
     
     processed_text = process_text(data.text)
     
-    is_link = checkLink(data.text)
-    is_date = checkDate(data.text)
-    is_math = checkMath(data.text)
-    is_address = checkAddress(data.text)
-    
-    classification = {"link": is_link, "date": is_date, "math" : is_math, "address" : is_address}
+    text_hash = content_hash(data.text)
+    cached = process_cache.get(text_hash)
+    now = time.monotonic()
+    is_duplicate = False
     
-    actual_text = data.text
-    
-    latex_result = None
-    s3_result = None
-    if is_math and not is_link:
-        print("\n" + "="*50)
-        print("MATH CONTENT DETECTED!")
-        print("="*50)
-        print("Use Java application with --capture flag to take screenshot for LaTeX conversion")
-        latex_result = "Math content detected - use Java screenshot capture"
+    if cached is not None:
+        classification = cached["classification"]
+        latex_result = cached["latex_result"]
+        s3_result = cached["s3_result"]
+        if s3_result and s3_uploader:
+            # the cached result is what submit() returned; report where the upload is now
+            s3_result = {**s3_result, **(s3_uploader.status(s3_result["s3_key"]) or {})}
+        is_duplicate = now - cached["last_seen"] < PROCESS_DEDUP_WINDOW
+        cached["last_seen"] = now
+        if is_duplicate:
+            process_stats["duplicates_suppressed"] += 1
+    else:
+        timings = {}
+        with time_stage("classify"):
+            classification = classifier.classify(data.text, timings)
+        observe_classify(timings)
+        is_link = classification["link"]
+        is_math = classification["math"]
         
-        if s3_storage:
-            output_data = {
-                "message": "Math content detected - use Java screenshot capture",
-                "text_length": len(processed_text),
-                "preview": processed_text[:100] + "..." if len(processed_text) > 100 else processed_text,
-                "classification": classification,
-                "latex_conversion": latex_result
-            }
-            metadata = {
-                "source": "text_input",
-                "original_text": processed_text,
-                "processing_type": "math_detection"
-            }
-            s3_result = s3_storage.upload_json_output(output_data, metadata)
-            if s3_result["success"]:
-                print(f"Math detection result stored to S3:")
-                print(f"  JSON URL: {s3_result['url']}")
+        latex_result = None
+        s3_result = None
+        if is_math and not is_link:
+            with time_stage("text_latex"):
+                latex_result = convert_typed_math(processed_text, classification)
+            log.info("math content detected", converted_locally=latex_result is not None)
+            if latex_result is not None:
+                math_message = "Math content converted to LaTeX"
             else:
-                print(f"S3 storage failed: {s3_result['error']}")
+                math_message = "Math content detected - use Java screenshot capture"
+                latex_result = math_message
+            
+            if s3_storage:
+                output_data = {
+                    "message": math_message,
+                    "text_length": len(processed_text),
+                    "preview": build_preview(processed_text),
+                    "classification": classification,
+                    "latex_conversion": latex_result
+                }
+                metadata = {
+                    "source": "text_input",
+                    "original_text": processed_text,
+                    "processing_type": "math_detection"
+                }
+                s3_result = s3_uploader.submit(
+                    "upload_json_output", s3_storage.json_output_key(output_data, metadata), output_data, metadata,
+                    on_failure=lambda result, key=text_hash: process_cache.pop(key)
+                )
+                log.debug("math detection result queued for S3", url=s3_result["url"])
+        
+        # failed uploads are not cached so the next copy retries them
+        if s3_result is None or s3_result["success"]:
+            process_cache.set(text_hash, {
+                "classification": classification,
+                "latex_result": latex_result,
+                "s3_result": s3_result,
+                "last_seen": now
+            })
     
-    response_data = {
+    response_data = with_original_text({
         "message": "Welcome to ClipSmart! Text received successfully.",
         "text_length": len(processed_text),
-        "preview": processed_text[:100] + "..." if len(processed_text) > 100 else processed_text,
-        "classification": classification,
-        "original_text": actual_text
-    }
+        "preview": build_preview(processed_text),
+        "classification": classification
+    }, data.text)
     
     if latex_result is not None:
         response_data["latex_conversion"] = latex_result
@@ -189,10 +594,16 @@ async def process_clipboard(data: ClipboardData):
         response_data["s3_storage"] = {
             "url": s3_result["url"],
             "success": s3_result["success"],
-            "content_type": s3_result.get("content_type", "application/json")
+            "content_type": s3_result.get("content_type", "application/json"),
+            "upload_status": s3_result.get("status")
         }
     
-    if mongo_storage.is_connected():
+    if cached is not None:
+        response_data["cached"] = True
+        if is_duplicate:
+            response_data["duplicate"] = True
+    
+    if mongo_storage and not is_duplicate:
         mongo_storage.log_processing_request(
             endpoint="/process",
             content_data={"preview": processed_text[:100], "length": len(processed_text)},
@@ -202,22 +613,119 @@ async def process_clipboard(data: ClipboardData):
     
     return response_data
 
+@app.post("/process-batch")
+def process_clipboard_batch(data: ClipboardBatchData):
+    """classify many clipboard texts in one request
+
+    declared sync so FastAPI runs it in its threadpool; large batches would
+    otherwise hold the event loop for the whole classification pass. Items
+    carry the /process fields, but are not cached, deduplicated or uploaded
+    to S3; batches over PROCESS_BATCH_MAX_ITEMS get a 413.
+    """
+    log.info("clipboard batch received", count=len(data.texts))
+    if len(data.texts) > PROCESS_BATCH_MAX_ITEMS:
+        return JSONBytesResponse({
+            "error": f"Batch has {len(data.texts)} texts; the limit is {PROCESS_BATCH_MAX_ITEMS}",
+            "status": "error"
+        }, status_code=413)
+    
+    with time_stage("classify"):
+        classifications = classifier.classify_batch(data.texts)
+    
+    results = []
+    log_items = []
+    for text, classification in zip(data.texts, classifications):
+        processed_text = process_text(text)
+        
+        item = with_original_text({
+            "message": "Welcome to ClipSmart! Text received successfully.",
+            "text_length": len(processed_text),
+            "preview": build_preview(processed_text),
+            "classification": classification
+        }, text)
+        if classification["math"] and not classification["link"]:
+            item["latex_conversion"] = convert_typed_math(processed_text, classification) or "Math content detected - use Java screenshot capture"
+        
+        results.append(item)
+        log_items.append({
+            "content_data": {"preview": processed_text[:100], "length": len(processed_text)},
+            "classification": classification,
+            "response_data": item
+        })
+    
+    if mongo_storage:
+        mongo_storage.log_processing_requests(endpoint="/process-batch", items=log_items)
+    
+    return {
+        "message": "Batch processed successfully",
+        "count": len(results),
+        "results": results
+    }
+
+@app.get("/cache-stats")
+async def cache_stats():
+    return {
+        "process": {**process_cache.stats(), **process_stats},
+        "latex": latex_cache.stats(),
+        "date": date_cache.stats(),
+        "model_calls": model_executor.stats(),
+        "single_flight": {"latex": latex_flight.stats(), "date": date_flight.stats()},
+        "s3_uploads": s3_uploader.stats() if s3_uploader else None,
+        "s3_storage": s3_storage.stats() if s3_storage else None,
+        "mongo": mongo_storage.stats() if mongo_storage else None,
+        "preprocessing": preprocess_stats,
+        "logging": logging_stats()
+    }
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text exposition of request and per-stage metrics"""
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/upload-status/{s3_key:path}")
+async def upload_status(s3_key: str):
+    """final outcome of a background S3 upload"""
+    status = s3_uploader.status(s3_key) if s3_uploader else None
+    if status is None:
+        return {"error": "Unknown upload key", "status": "error", "s3_key": s3_key}
+    return status
+
 @app.post("/process-image")
-async def process_screenshot(data: ScreenshotData):
-    print(f"Received screenshot data of type: {data.type}")
+async def process_screenshot(request: Request):
+    """convert a screenshot to LaTeX
+
+    accepts JSON {"image": base64, "type": ...}, a raw image/png body
+    (type via ?type=) or a multipart upload with an "image" file field
+    """
+    try:
+        image_bytes, image_type, payload_length = await read_image_request(request, MAX_IMAGE_BYTES)
+    except (ImageTooLarge, ValueError) as e:
+        # ValueError covers malformed base64 in the JSON body
+        return error_response("/process-image", {
+            "error": f"Failed to process screenshot: {str(e)}",
+            "status": "error"
+        })
+    
+    log.info("screenshot received", image_type=image_type, payload_length=payload_length)
     
     try:
-        image_bytes = base64.b64decode(data.image)
+        # lazy open: reads the header only, validating the payload without a re-encode;
+        # pixels are decoded (and timed as the "pil" stage) in preprocess and the phash
         image = Image.open(io.BytesIO(image_bytes))
         
-        temp_path = "temp_screenshot.png"
-        image.save(temp_path)
-        
         if not GENAI_API_KEY:
-            return {"error": "GENAI_API_KEY not configured"}
+            return error_response("/process-image", {"error": "GENAI_API_KEY not configured"})
         
-        print("Processing screenshot with AI...")
-        latex_result = image_to_latex(temp_path, GENAI_API_KEY)
+        preprocessing = None
+        with time_stage("latex_cache"):
+            # sha256/dHash of the image and SQLite reads stay off the event loop
+            latex_result = await asyncio.get_running_loop().run_in_executor(None, latex_cache.lookup, image_bytes, image)
+        if latex_result is None:
+            latex_result, preprocessing = await latex_flight.do(
+                content_hash(image_bytes), functools.partial(transcribe_screenshot, image_bytes, image)
+            )
+        else:
+            log.debug("using cached LaTeX for screenshot")
         
         processed_latex = process_text(latex_result) if latex_result else latex_result
         
@@ -232,19 +740,12 @@ async def process_screenshot(data: ScreenshotData):
             }
             metadata = {
                 "source": "screenshot",
-                "type": data.type,
-                "processing_timestamp": str(os.path.getmtime(temp_path)),
+                "type": image_type,
+                "processing_timestamp": str(time.time()),
                 "processing_type": "image_to_latex"
             }
-            s3_result = s3_storage.upload_json_output(output_data, metadata)
-            if s3_result["success"]:
-                print(f"Screenshot processing result stored to S3:")
-                print(f"  JSON URL: {s3_result['url']}")
-            else:
-                print(f"S3 storage failed: {s3_result['error']}")
-        
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+            s3_result = s3_uploader.submit("upload_json_output", s3_storage.json_output_key(output_data, metadata), output_data, metadata)
+            log.debug("screenshot result queued for S3", url=s3_result["url"])
         
         is_math_result = checkMath(processed_latex) if processed_latex else False
         
@@ -255,17 +756,21 @@ async def process_screenshot(data: ScreenshotData):
             "status": "success"
         }
         
+        if preprocessing:
+            response["preprocessing"] = preprocessing
+        
         if s3_result:
             response["s3_storage"] = {
                 "url": s3_result["url"],
                 "success": s3_result["success"],
-                "content_type": s3_result.get("content_type", "application/json")
+                "content_type": s3_result.get("content_type", "application/json"),
+                "upload_status": s3_result.get("status")
             }
     
-        if mongo_storage.is_connected():
+        if mongo_storage:
             mongo_storage.log_processing_request(
                 endpoint="/process-image",
-                content_data={"preview": f"Screenshot ({data.type})", "length": len(data.image)},
+                content_data={"preview": f"Screenshot ({image_type})", "length": payload_length},
                 classification={"is_math": is_math_result},
                 response_data=response
             )
@@ -273,33 +778,32 @@ async def process_screenshot(data: ScreenshotData):
         return response
         
     except Exception as e:
-        # Clean up temp file on error
-        if os.path.exists("temp_screenshot.png"):
-            os.remove("temp_screenshot.png")
-        
-        return {
+        return error_response("/process-image", {
             "error": f"Failed to process screenshot: {str(e)}",
             "status": "error"
-        }
+        })
 
 @app.post("/create-calendar-event")
 async def create_calendar_event(data: CalendarEventData):
     """create calendar event from date text"""
-    print(f"Received calendar event request for text: {data.text}")
-    print(f"User description: {data.description}")
+    log.info("calendar event requested", **content_fields(data.text), **content_fields(data.description, "description"))
     
-    if not GENAI_API_KEY:
-        return {"error": "GENAI_API_KEY not configured", "status": "error"}
+    # simple absolute dates resolve locally; everything else goes to Gemini
+    with time_stage("date_parse"):
+        date_info = parse_date_locally(data.text, CALENDAR_TIMEZONE)
+    
+    if date_info is None and not GENAI_API_KEY:
+        return error_response("/create-calendar-event", {"error": "GENAI_API_KEY not configured", "status": "error"})
     
     try:
-        date_info = format_date(data.text, GENAI_API_KEY)
+        if date_info is None:
+            date_info = await cached_format_date(data.text, GENAI_API_KEY)
         
         if not date_info.get("has_valid_date", False):
-            return {
+            return error_response("/create-calendar-event", with_original_text({
                 "error": "Could not extract valid date from text",
-                "status": "error",
-                "original_text": data.text
-            }
+                "status": "error"
+            }, data.text))
         
         ics_content = generate_ics(
             summary=date_info.get("summary", "Event"),
@@ -311,14 +815,13 @@ async def create_calendar_event(data: CalendarEventData):
         s3_result = None
         if s3_storage:
             filename = f"event_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ics"
-            s3_result = s3_storage.upload_text_file(ics_content, filename, "text/calendar")
-            
-            if s3_result["success"]:
-                print(f"ICS file stored to S3: {s3_result['url']}")
-            else:
-                print(f"S3 storage failed: {s3_result['error']}")
+            s3_result = s3_uploader.submit(
+                "upload_text_file", s3_storage.text_file_key(filename), ics_content, filename, "text/calendar",
+                content_type="text/calendar"
+            )
+            log.debug("ICS file queued for S3", url=s3_result["url"])
         
-        response = {
+        response = with_original_text({
             "message": "Calendar event created successfully",
             "status": "success",
             "ics_content": ics_content,
@@ -327,19 +830,19 @@ async def create_calendar_event(data: CalendarEventData):
                 "start_date": date_info["start_date"],
                 "end_date": date_info["end_date"],
                 "description": data.description
-            },
-            "original_text": data.text
-        }
+            }
+        }, data.text)
         
         if s3_result and s3_result["success"]:
             response["download_url"] = s3_result["url"]
             response["s3_storage"] = {
                 "url": s3_result["url"],
                 "success": s3_result["success"],
-                "content_type": "text/calendar"
+                "content_type": "text/calendar",
+                "upload_status": s3_result.get("status")
             }
         
-        if mongo_storage.is_connected():
+        if mongo_storage:
             mongo_storage.log_processing_request(
                 endpoint="/create-calendar-event",
                 content_data={"preview": data.text[:100], "length": len(data.text)},
@@ -350,12 +853,11 @@ async def create_calendar_event(data: CalendarEventData):
         return response
         
     except Exception as e:
-        print(f"Error creating calendar event: {e}")
-        return {
+        log.error("creating calendar event failed", error=str(e))
+        return error_response("/create-calendar-event", with_original_text({
             "error": f"Failed to create calendar event: {str(e)}",
-            "status": "error",
-            "original_text": data.text
-        }
+            "status": "error"
+        }, data.text))
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,288 @@
+import bisect
+import contextlib
+import contextvars
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# seconds; spans sub-millisecond classifier checks up to slow model calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextlib.contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        """child metric for one label combination; cache it on hot paths"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _unlabeled(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} requires labels {self.labelnames}")
+        return self.labels()
+
+    def _samples(self, labels: List[Tuple[str, str]], child) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in sorted(children):
+            lines.extend(self._samples(list(zip(self.labelnames, key)), child))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._unlabeled().inc(amount)
+
+    def _samples(self, labels, child) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(child.value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._unlabeled().observe(value)
+
+    def time(self):
+        return self._unlabeled().time()
+
+    def _samples(self, labels, child) -> List[str]:
+        with child._lock:
+            counts = list(child.counts)
+            total = child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', _format_value(bound))])} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """all metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUESTS = registry.register(Counter(
+    "clipsmart_requests_total", "HTTP requests by endpoint, method and status code",
+    ["endpoint", "method", "status"]
+))
+REQUEST_ERRORS = registry.register(Counter(
+    "clipsmart_request_errors_total", "Requests that failed, including error results returned with status 200",
+    ["endpoint"]
+))
+REQUEST_SECONDS = registry.register(Histogram(
+    "clipsmart_request_duration_seconds", "Time spent handling a request", ["endpoint"]
+))
+REQUEST_BYTES = registry.register(Histogram(
+    "clipsmart_request_size_bytes", "Request body size from Content-Length", ["endpoint"], buckets=BYTE_BUCKETS
+))
+STAGE_SECONDS = registry.register(Histogram(
+    "clipsmart_stage_duration_seconds", "Time spent in one processing stage", ["stage"]
+))
+CLASSIFY_SECONDS = registry.register(Histogram(
+    "clipsmart_classify_duration_seconds", "Time spent in one classifier check", ["check"]
+))
+IMAGE_BYTES = registry.register(Histogram(
+    "clipsmart_image_bytes", "Screenshot size before and after preprocessing", ["stage"], buckets=BYTE_BUCKETS
+))
+
+
+# per-request stage totals for the Server-Timing header; None outside a timed request
+_request_stages: contextvars.ContextVar = contextvars.ContextVar("request_stages", default=None)
+
+# stage names as they appear in Server-Timing
+SERVER_TIMING_NAMES = {"gemini": "llm", "s3_put": "s3", "mongo_insert": "mongo"}
+
+
+@contextlib.contextmanager
+def time_stage(stage: str) -> Iterator[None]:
+    """record the duration of the enclosed block under STAGE_SECONDS{stage}
+
+    inside a request started with start_request_timing the duration is also
+    added to that request's stage totals
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.labels(stage=stage).observe(elapsed)
+        stages = _request_stages.get()
+        if stages is not None:
+            stages[stage] = stages.get(stage, 0.0) + elapsed
+
+
+def start_request_timing() -> Tuple[Dict[str, float], contextvars.Token]:
+    """collect stage durations for the current request; pass the token to reset_request_timing"""
+    stages = {}
+    return stages, _request_stages.set(stages)
+
+
+def reset_request_timing(token: contextvars.Token):
+    _request_stages.reset(token)
+
+
+def server_timing_header(stages: Dict[str, float], total: Optional[float] = None) -> str:
+    """Server-Timing value such as 'classify;dur=0.41, llm;dur=812.3, total;dur=830.2'"""
+    parts = [f"{SERVER_TIMING_NAMES.get(stage, stage)};dur={seconds * 1000:.2f}" for stage, seconds in stages.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def observe_classify(timings: Optional[Dict[str, float]]):
+    """record per-check durations collected by ClassifierEngine.classify"""
+    if timings:
+        for check, seconds in timings.items():
+            CLASSIFY_SECONDS.labels(check=check).observe(seconds)
+
+
+def observe_preprocessing(stats: Dict[str, Any]):
+    """record the image sizes reported by preprocess_image"""
+    IMAGE_BYTES.labels(stage="before").observe(stats["bytes_before"])
+    IMAGE_BYTES.labels(stage="after").observe(stats["bytes_after"])
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware counting requests, latency and body size per route template
+
+    Written against the raw ASGI interface rather than as an
+    @app.middleware("http") function, which wraps every request in extra
+    tasks and streams and costs far more than the metrics themselves.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # the router stores the matched route in the shared scope
+            route = scope.get("route")
+            endpoint = route.path if route is not None else "unmatched"
+            REQUESTS.labels(endpoint=endpoint, method=scope["method"], status=status).inc()
+            REQUEST_SECONDS.labels(endpoint=endpoint).observe(time.perf_counter() - started)
+            for name, value in scope.get("headers", ()):
+                if name == b"content-length":
+                    if value.isdigit():
+                        REQUEST_BYTES.labels(endpoint=endpoint).observe(int(value))
+                    break
+            if status >= 400:
+                REQUEST_ERRORS.labels(endpoint=endpoint).inc()
@@ -0,0 +1,146 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class ModelCallTimeout(Exception):
+    pass
+
+
+def _call_soon(loop: asyncio.AbstractEventLoop, callback: Callable[[], Any]):
+    """schedule callback on loop from a worker thread; a closed loop has nobody left to notify"""
+    try:
+        loop.call_soon_threadsafe(callback)
+    except RuntimeError:
+        pass
+
+
+class ModelCallExecutor:
+    """runs blocking Gemini SDK calls off the event loop
+
+    Calls go to a dedicated thread pool sized to max_concurrency, so model
+    round trips never occupy the loop or the threadpool FastAPI uses for
+    sync endpoints. Callers beyond the limit wait on a semaphore, and each
+    call is bounded by a timeout once it starts running.
+    """
+
+    def __init__(self, max_concurrency: int = 4, timeout: Optional[float] = 60.0):
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="genai")
+        self._semaphore = None
+        self._stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # created lazily so it binds to the running server loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _count(self, field: str, delta: int = 1):
+        with self._stats_lock:
+            setattr(self, field, getattr(self, field) + delta)
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """await func(*args, **kwargs) on the model pool
+
+        The timeout counts from when a worker starts the call. A call that
+        times out keeps its slot until its thread returns, so no more than
+        max_concurrency model calls ever run at once.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore()
+        started = asyncio.Event()
+        # run in a copy of the caller's context so per-request stage timings follow the call
+        context = contextvars.copy_context()
+
+        def call():
+            _call_soon(loop, started.set)
+            return context.run(func, *args, **kwargs)
+
+        def finished(_):
+            self._count("in_flight", -1)
+            _call_soon(loop, semaphore.release)
+
+        await semaphore.acquire()
+        try:
+            future = self._executor.submit(call)
+        except BaseException:
+            semaphore.release()
+            raise
+        self._count("in_flight")
+        future.add_done_callback(finished)
+
+        try:
+            await started.wait()
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self._count("timeouts")
+            raise ModelCallTimeout(f"model call timed out after {timeout}s")
+        except asyncio.CancelledError:
+            # not started yet: drop it; running: it finishes and frees the slot
+            future.cancel()
+            raise
+        except Exception:
+            self._count("failed")
+            raise
+
+        self._count("completed")
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "timeout": self.timeout,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timeouts": self.timeouts
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+class SingleFlight:
+    """shares one in-flight call among concurrent callers asking for the same key
+
+    The first caller for a key starts call() as a task; callers arriving
+    while it runs await that task instead of starting their own, and all of
+    them get its result or exception. The task is shielded, so a caller that
+    disconnects does not cancel the call for the others. Nothing is kept
+    once the call finishes; caching stays with the callers.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight)
+        }
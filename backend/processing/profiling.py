@@ -0,0 +1,104 @@
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+# a thread whose innermost frame is in one of these modules is parked, not working
+IDLE_MODULES = ("threading.py", "selectors.py", "queue.py")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    return frame.f_code.co_filename.endswith(IDLE_MODULES)
+
+
+class SamplingProfiler:
+    """samples every thread's Python stack from a background thread
+
+    Stacks are counted in folded form ("thread;outer;...;inner"), which
+    flamegraph.pl, speedscope and inferno read directly. Parked threads are
+    skipped so idle workers do not swamp the profile. All threads are
+    sampled, so concurrent requests share the picture.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own or _is_idle(frame):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.samples[";".join(reversed(stack))] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Dict[str, int]:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return dict(self.samples)
+
+
+def write_folded(path: str, samples: Dict[str, int]):
+    with open(path, "w") as f:
+        for stack, count in sorted(samples.items()):
+            f.write(f"{stack} {count}\n")
+
+
+class RequestProfiler:
+    """profiles a sample_rate fraction of requests, one at a time"""
+
+    def __init__(self, sample_rate: float = 0.0, directory: str = "profiles", interval: float = 0.005):
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.interval = interval
+        self.profiled = 0
+        self._active = threading.Lock()
+
+    def maybe_start(self) -> Optional[SamplingProfiler]:
+        """a running profiler when this request is sampled, else None"""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        if not self._active.acquire(blocking=False):
+            return None
+        profiler = SamplingProfiler(self.interval)
+        profiler.start()
+        return profiler
+
+    def finish(self, profiler: SamplingProfiler, label: str) -> Optional[str]:
+        """stop profiler and write its folded stacks; returns the file name"""
+        try:
+            samples = profiler.stop()
+        finally:
+            self._active.release()
+        if not samples:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        safe_label = "".join(c if c.isalnum() else "_" for c in label).strip("_") or "root"
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{safe_label}.folded"
+        write_folded(os.path.join(self.directory, filename), samples)
+        self.profiled += 1
+        return filename
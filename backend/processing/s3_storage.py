@@ -1,23 +1,85 @@
 import boto3
+import gzip
+import io
 import json
 import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from botocore.exceptions import ClientError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+from cache import content_hash
+from serialization import dumps
+
+# metadata fields left out of content-addressed keys because they differ on every request
+VOLATILE_METADATA = ("processing_timestamp",)
+
+# content types gzipped when compression is on
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+IMAGE_SUFFIXES = {"png": ".png", "webp": ".webp"}
 
 class S3Storage:
-    def __init__(self, bucket_name, aws_access_key_id=None, aws_secret_access_key=None, region_name='us-east-1'):
+    def __init__(self, bucket_name, aws_access_key_id=None, aws_secret_access_key=None, region_name='us-east-1',
+                 connect_timeout=None, read_timeout=None, content_addressed=False, known_keys=None,
+                 max_pool_connections=None, upload_concurrency=4, multipart_threshold=8 * 1024 * 1024,
+                 gzip_text=False, gzip_min_bytes=1024, image_format=None):
         self.bucket_name = bucket_name
         self.region_name = region_name
+        # gzip_text: JSON/text bodies of at least gzip_min_bytes are stored with Content-Encoding: gzip;
+        # image_format: "png" (optimized) or "webp" (lossless) re-encodes images before upload
+        self.gzip_text = gzip_text
+        self.gzip_min_bytes = gzip_min_bytes
+        if image_format and image_format not in IMAGE_SUFFIXES:
+            raise ValueError(f"image_format must be one of {', '.join(IMAGE_SUFFIXES)}")
+        self.image_format = image_format
+        # content_addressed: keys are a hash of the payload, so identical results share one
+        # object; known_keys (a KnownKeys index) then lets uploads skip content already stored
+        self.content_addressed = content_addressed
+        self.known_keys = known_keys if content_addressed else None
+        self.deduplicated = 0
+        self.bytes_uploaded = 0
+        self.bytes_saved = 0
+        self._stats_lock = threading.Lock()
+        
+        # objects of one result go up in parallel on this pool, sharing the client's connections
+        self._executor = ThreadPoolExecutor(max_workers=upload_concurrency, thread_name_prefix="s3-put")
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_threshold,
+            max_concurrency=upload_concurrency
+        )
+        
+        config_options = {}
+        if connect_timeout is not None:
+            config_options["connect_timeout"] = connect_timeout
+        if read_timeout is not None:
+            config_options["read_timeout"] = read_timeout
+        if max_pool_connections is not None:
+            config_options["max_pool_connections"] = max_pool_connections
+        config = Config(**config_options) if config_options else None
         
         if aws_access_key_id and aws_secret_access_key:
             self.s3_client = boto3.client(
                 's3',
                 aws_access_key_id=aws_access_key_id,
                 aws_secret_access_key=aws_secret_access_key,
-                region_name=region_name
+                region_name=region_name,
+                config=config
             )
         else:
-            self.s3_client = boto3.client('s3', region_name=region_name)
+            self.s3_client = boto3.client('s3', region_name=region_name, config=config)
+    
+    def check_bucket(self):
+        """confirm the bucket is reachable with these credentials"""
+        try:
+            self.s3_client.head_bucket(Bucket=self.bucket_name)
+            return {"success": True}
+        except (ClientError, BotoCoreError) as e:
+            return {"success": False, "error": f"S3 bucket check failed: {str(e)}"}
     
     def setup_public_bucket(self):
         """setup bucket for public access"""
@@ -72,11 +134,122 @@ class S3Storage:
         except ClientError as e:
             return {"success": False, "error": f"Failed to configure bucket: {str(e)}"}
     
-    def upload_json_output(self, output_data, metadata=None):
+    def public_url(self, file_key):
+        return f"https://{self.bucket_name}.s3.{self.region_name}.amazonaws.com/{file_key}"
+    
+    def _unique_stem(self):
+        # the random suffix keeps two uploads in the same second from overwriting each other
+        return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    
+    def content_key(self, prefix, data, suffix):
+        return f"{prefix}/{content_hash(data)[:32]}{suffix}"
+    
+    def json_output_key(self, output_data=None, metadata=None):
+        if self.content_addressed and output_data is not None:
+            stable_metadata = {k: v for k, v in (metadata or {}).items() if k not in VOLATILE_METADATA}
+            payload = dumps({"processing_result": output_data, "metadata": stable_metadata}, sort_keys=True)
+            return self.content_key("outputs", payload, "_result.json")
+        return f"outputs/{self._unique_stem()}_result.json"
+    
+    def latex_output_key(self, latex_content):
+        if self.content_addressed:
+            return self.content_key("latex_outputs", latex_content, "_output.txt")
+        return f"latex_outputs/{self._unique_stem()}_output.txt"
+    
+    def image_key(self, image_bytes):
+        suffix = "_input" + IMAGE_SUFFIXES.get(self.image_format, ".png")
+        if self.content_addressed:
+            return self.content_key("images", image_bytes, suffix)
+        return f"images/{self._unique_stem()}{suffix}"
+    
+    def text_file_key(self, filename):
+        # file names like event_<timestamp>.ics repeat within a second, so they get a random suffix too
+        name, extension = os.path.splitext(filename)
+        return f"files/{name}_{uuid.uuid4().hex[:8]}{extension}"
+    
+    def object_exists(self, file_key):
+        try:
+            self.s3_client.head_object(Bucket=self.bucket_name, Key=file_key)
+            return True
+        except (ClientError, BotoCoreError):
+            return False
+    
+    def is_known(self, file_key):
+        """stored by this process already; answered from memory without a request"""
+        return self.known_keys is not None and self.known_keys.known_locally(file_key)
+    
+    def _already_stored(self, file_key):
+        if self.known_keys is not None and self.known_keys.contains(file_key, self.object_exists):
+            with self._stats_lock:
+                self.deduplicated += 1
+            return True
+        return False
+    
+    def _remember(self, file_key):
+        if self.known_keys is not None:
+            self.known_keys.add(file_key)
+    
+    def _send(self, file_key, body, content_type):
+        """PUT body, gzipped when enabled; large bodies go through the multipart transfer manager"""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        extra_args = {"ContentType": content_type}
+        size_before = len(body)
+        if self.gzip_text and content_type.startswith(COMPRESSIBLE_TYPES) and size_before >= self.gzip_min_bytes:
+            body = gzip.compress(body, compresslevel=6, mtime=0)
+            extra_args["ContentEncoding"] = "gzip"
+        
+        if len(body) >= self.transfer_config.multipart_threshold:
+            self.s3_client.upload_fileobj(io.BytesIO(body), self.bucket_name, file_key,
+                                          ExtraArgs=extra_args, Config=self.transfer_config)
+        else:
+            self.s3_client.put_object(Bucket=self.bucket_name, Key=file_key, Body=body, **extra_args)
+        with self._stats_lock:
+            self.bytes_uploaded += len(body)
+            self.bytes_saved += size_before - len(body)
+    
+    def _put_object(self, file_key, body, content_type):
+        """PUT unless the known-keys index says this content is already stored
+
+        returns True when the upload was skipped
+        """
+        if self._already_stored(file_key):
+            return True
+        self._send(file_key, body, content_type)
+        self._remember(file_key)
+        return False
+    
+    def _put_image(self, image_key, image_bytes):
+        if self._already_stored(image_key):
+            return True
+        content_type = "image/png"
+        if self.image_format:
+            from conversion.preprocess import encode_for_storage
+            image_bytes, content_type = encode_for_storage(image_bytes, self.image_format)
+        self._send(image_key, image_bytes, content_type)
+        self._remember(image_key)
+        return False
+    
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "content_addressed": self.content_addressed,
+                "deduplicated": self.deduplicated,
+                "bytes_uploaded": self.bytes_uploaded,
+                "bytes_saved": self.bytes_saved,
+                "known_keys": self.known_keys.stats() if self.known_keys is not None else None
+            }
+    
+    def close(self):
+        self._executor.shutdown(wait=True)
+        if self.known_keys is not None:
+            self.known_keys.close()
+    
+    def upload_json_output(self, output_data, metadata=None, file_key=None):
         """upload output data as JSON to S3"""
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_key = f"outputs/{timestamp}_result.json"
+            file_key = file_key or self.json_output_key(output_data, metadata)
             
             json_data = {
                 "timestamp": timestamp,
@@ -84,14 +257,9 @@ class S3Storage:
                 "metadata": metadata or {}
             }
             
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=file_key,
-                Body=json.dumps(json_data, indent=2),
-                ContentType='application/json'
-            )
+            deduplicated = self._put_object(file_key, dumps(json_data), 'application/json')
             
-            public_url = f"https://{self.bucket_name}.s3.{self.region_name}.amazonaws.com/{file_key}"
+            public_url = self.public_url(file_key)
             
             return {
                 "success": True,
@@ -99,7 +267,8 @@ class S3Storage:
                 "bucket": self.bucket_name,
                 "url": public_url,
                 "s3_uri": f"s3://{self.bucket_name}/{file_key}",
-                "content_type": "application/json"
+                "content_type": "application/json",
+                "deduplicated": deduplicated
             }
             
         except ClientError as e:
@@ -113,26 +282,51 @@ class S3Storage:
                 "error": f"Unexpected error: {str(e)}"
             }
 
-    def upload_latex_output(self, latex_content, metadata=None):
+    def upload_latex_output(self, latex_content, metadata=None, file_key=None):
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_key = f"latex_outputs/{timestamp}_output.txt"
+            file_key = file_key or self.latex_output_key(latex_content)
             
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=file_key,
-                Body=latex_content,
-                ContentType='text/plain'
-            )
+            deduplicated = self._put_object(file_key, latex_content, 'text/plain')
+            
+            public_url = self.public_url(file_key)
+            
+            return {
+                "success": True,
+                "s3_key": file_key,
+                "bucket": self.bucket_name,
+                "url": public_url,
+                "s3_uri": f"s3://{self.bucket_name}/{file_key}",
+                "deduplicated": deduplicated
+            }
+            
+        except ClientError as e:
+            return {
+                "success": False,
+                "error": f"S3 upload failed: {str(e)}"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Unexpected error: {str(e)}"
+            }
+    
+    def upload_text_file(self, content, filename, content_type='text/plain', file_key=None):
+        """upload text content (e.g. an .ics file) under files/"""
+        try:
+            file_key = file_key or self.text_file_key(filename)
             
-            public_url = f"https://{self.bucket_name}.s3.{self.region_name}.amazonaws.com/{file_key}"
+            # keyed by file name, not content, so never deduplicated
+            self._send(file_key, content, content_type)
+            
+            public_url = self.public_url(file_key)
             
             return {
                 "success": True,
                 "s3_key": file_key,
                 "bucket": self.bucket_name,
                 "url": public_url,
-                "s3_uri": f"s3://{self.bucket_name}/{file_key}"
+                "s3_uri": f"s3://{self.bucket_name}/{file_key}",
+                "content_type": content_type
             }
             
         except ClientError as e:
@@ -160,28 +354,19 @@ class S3Storage:
     
     def upload_image_with_latex(self, image_path, latex_content, metadata=None):
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            image_key = f"images/{timestamp}_input.png"
-            latex_key = f"latex_outputs/{timestamp}_output.txt"
-            
             with open(image_path, 'rb') as image_file:
-                self.s3_client.put_object(
-                    Bucket=self.bucket_name,
-                    Key=image_key,
-                    Body=image_file,
-                    ContentType='image/png'
-                )
+                image_bytes = image_file.read()
             
-            image_public_url = f"https://{self.bucket_name}.s3.{self.region_name}.amazonaws.com/{image_key}"
-            latex_public_url = f"https://{self.bucket_name}.s3.{self.region_name}.amazonaws.com/{latex_key}"
+            image_key = self.image_key(image_bytes)
+            latex_key = self.latex_output_key(latex_content)
             
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=latex_key,
-                Body=latex_content,
-                ContentType='text/plain'
-            )
+            # the image goes up on the pool while this thread uploads the LaTeX
+            image_upload = self._executor.submit(self._put_image, image_key, image_bytes)
+            latex_deduplicated = self._put_object(latex_key, latex_content, 'text/plain')
+            image_deduplicated = image_upload.result()
+            
+            image_public_url = self.public_url(image_key)
+            latex_public_url = self.public_url(latex_key)
             
             return {
                 "success": True,
@@ -191,7 +376,8 @@ class S3Storage:
                 "image_url": image_public_url,
                 "latex_url": latex_public_url,
                 "image_s3_uri": f"s3://{self.bucket_name}/{image_key}",
-                "latex_s3_uri": f"s3://{self.bucket_name}/{latex_key}"
+                "latex_s3_uri": f"s3://{self.bucket_name}/{latex_key}",
+                "deduplicated": image_deduplicated and latex_deduplicated
             }
             
         except ClientError as e:
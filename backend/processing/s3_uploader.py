@@ -0,0 +1,153 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from cache import TTLCache
+from metrics import time_stage
+from app_logging import LogThrottle, get_logger
+
+log = get_logger("s3")
+
+
+class BackgroundUploader:
+    """uploads to S3 from a worker pool instead of the request path
+
+    submit() takes an S3Storage upload method name and a pre-computed key,
+    queues the job and immediately returns the URL the object will have.
+    Workers retry failed uploads with exponential backoff; the final outcome
+    for each key is available from status(). When the queue is full the job
+    is dropped with status "dropped": submit() runs on the event loop, so it
+    never uploads itself. shutdown() drains the queue.
+    """
+
+    def __init__(self, storage, max_queue: int = 1000, workers: int = 4,
+                 max_retries: int = 3, backoff: float = 0.5, status_size: int = 10000):
+        self.storage = storage
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._statuses = TTLCache(max_size=status_size, ttl=None)
+        self._stats_lock = threading.Lock()
+        self.uploaded = 0
+        self.failed = 0
+        self.retries = 0
+        self.dropped = 0
+        self.deduplicated = 0
+        self._drop_log = LogThrottle()
+        self._stopping = threading.Event()
+        self._workers = []
+        for i in range(workers):
+            worker = threading.Thread(target=self._run, name=f"s3-uploader-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _count(self, field: str):
+        with self._stats_lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def submit(self, method: str, file_key: str, *args,
+               content_type: str = "application/json",
+               on_failure: Optional[Callable[[Dict[str, Any]], None]] = None,
+               **kwargs) -> Dict[str, Any]:
+        """queue storage.<method>(*args, file_key=file_key, **kwargs)
+
+        returns a result dict shaped like the synchronous upload methods,
+        with status "pending" until a worker finishes the upload
+        """
+        pending = {
+            "success": True,
+            "status": "pending",
+            "s3_key": file_key,
+            "bucket": self.storage.bucket_name,
+            "url": self.storage.public_url(file_key),
+            "s3_uri": f"s3://{self.storage.bucket_name}/{file_key}",
+            "content_type": content_type
+        }
+        if self.storage.is_known(file_key):
+            # content-addressed key this process already uploaded: nothing to queue
+            self._count("deduplicated")
+            result = {**pending, "status": "uploaded", "deduplicated": True}
+            self._statuses.set(file_key, result)
+            return result
+        self._statuses.set(file_key, dict(pending))
+
+        job = (method, file_key, args, kwargs, on_failure)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._count("dropped")
+            result = {**pending, "success": False, "status": "dropped", "error": "S3 upload queue is full"}
+            self._statuses.set(file_key, result)
+            suppressed = self._drop_log.ready()
+            if suppressed is not None:
+                log.warning("S3 upload queue full; dropping uploads", s3_key=file_key, also_dropped=suppressed)
+            if on_failure is not None:
+                on_failure(result)
+            return result
+
+        return pending
+
+    def status(self, file_key: str) -> Optional[Dict[str, Any]]:
+        return self._statuses.get(file_key)
+
+    def _upload(self, job) -> Dict[str, Any]:
+        method, file_key, args, kwargs, on_failure = job
+        upload = getattr(self.storage, method)
+
+        attempt = 0
+        while True:
+            with time_stage("s3_put"):
+                result = upload(*args, file_key=file_key, **kwargs)
+            if result.get("success") or attempt >= self.max_retries:
+                break
+            self._count("retries")
+            time.sleep(self.backoff * (2 ** attempt))
+            attempt += 1
+
+        if result.get("success"):
+            self._count("deduplicated" if result.get("deduplicated") else "uploaded")
+            result = {**result, "status": "uploaded"}
+        else:
+            self._count("failed")
+            result = {**result, "status": "failed", "s3_key": file_key}
+            log.error("S3 background upload failed", s3_key=file_key, error=result.get("error"))
+            if on_failure is not None:
+                on_failure(result)
+
+        self._statuses.set(file_key, result)
+        return result
+
+    def _run(self):
+        while True:
+            try:
+                job = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            try:
+                self._upload(job)
+            except Exception as e:
+                log.error("S3 background upload crashed", error=str(e))
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "queued": self._queue.qsize(),
+                "uploaded": self.uploaded,
+                "failed": self.failed,
+                "retries": self.retries,
+                "dropped": self.dropped,
+                "deduplicated": self.deduplicated
+            }
+
+    def shutdown(self, timeout: Optional[float] = 30.0):
+        """finish queued uploads, then stop the workers"""
+        self._stopping.set()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for worker in self._workers:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            worker.join(remaining)
@@ -0,0 +1,20 @@
+from typing import Any, Union
+
+import orjson
+
+
+def _default(obj: Any) -> str:
+    # ObjectId, Decimal and anything else orjson does not know, as json.dumps(default=str) did
+    return str(obj)
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """compact UTF-8 JSON via orjson; shared by API responses, S3 payloads, log lines and the Mongo spool"""
+    option = orjson.OPT_NON_STR_KEYS
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return orjson.dumps(obj, default=_default, option=option)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    return orjson.loads(data)
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# the service modules import each other as top-level modules (from cache import ...),
+# the same way main.py is run from backend/processing
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,85 @@
+import pytest
+
+import cache
+from cache import TTLCache, content_hash
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    entries = TTLCache(max_size=10, ttl=5)
+    entries.set("a", 1)
+    clock[0] += 4.9
+    assert entries.get("a") == 1
+    clock[0] += 0.1
+    assert entries.get("a") is None
+    assert entries.stats()["expirations"] == 1
+    assert len(entries) == 0
+
+
+def test_per_entry_ttl_and_no_ttl(clock):
+    entries = TTLCache(max_size=10, ttl=None)
+    entries.set("forever", 1)
+    entries.set("short", 2, ttl=1)
+    clock[0] += 10_000
+    assert entries.get("forever") == 1
+    assert entries.get("short", "gone") == "gone"
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    entries = TTLCache(max_size=2, ttl=None)
+    entries.set("a", 1)
+    entries.set("b", 2)
+    entries.get("a")
+    entries.set("c", 3)
+    assert entries.get("b") is None
+    assert entries.get("a") == 1 and entries.get("c") == 3
+    assert entries.stats()["evictions"] == 1
+
+
+def test_setting_an_existing_key_refreshes_it(clock):
+    entries = TTLCache(max_size=2, ttl=None)
+    entries.set("a", 1)
+    entries.set("b", 2)
+    entries.set("a", 10)
+    entries.set("c", 3)
+    assert entries.get("a") == 10
+    assert entries.get("b") is None
+
+
+def test_stats_count_hits_and_misses(clock):
+    entries = TTLCache(max_size=4, ttl=60)
+    assert entries.stats()["hit_rate"] == 0.0
+    entries.set("a", 1)
+    entries.get("a")
+    entries.get("a")
+    entries.get("missing")
+    stats = entries.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+    assert stats["size"] == 1 and stats["max_size"] == 4 and stats["ttl"] == 60
+
+
+def test_pop_and_clear(clock):
+    entries = TTLCache(max_size=4)
+    entries.set("a", 1)
+    assert entries.pop("a") == 1
+    assert entries.pop("a", "none") == "none"
+    entries.set("b", 2)
+    entries.clear()
+    assert len(entries) == 0
+
+
+def test_rejects_non_positive_size():
+    with pytest.raises(ValueError):
+        TTLCache(max_size=0)
+
+
+def test_content_hash_matches_for_text_and_bytes():
+    assert content_hash("x^2") == content_hash(b"x^2")
+    assert len(content_hash("")) == 64
@@ -0,0 +1,63 @@
+import pytest
+
+from conversion.date_parse import parse_date_locally
+
+
+@pytest.mark.parametrize("text, start, end, summary", [
+    ("Team offsite March 14, 2025", "20250314T090000Z", "20250314T100000Z", "Team offsite"),
+    ("Dentist on March 14, 2025 at 3:30 pm", "20250314T153000Z", "20250314T163000Z", "Dentist"),
+    ("Meeting 2025-03-14 15:00 UTC", "20250314T150000Z", "20250314T160000Z", "Meeting"),
+    ("Standup March 14, 2025 3pm EST", "20250314T200000Z", "20250314T210000Z", "Standup"),
+    ("Review 2025-03-14 10am-11:30am pst", "20250314T180000Z", "20250314T193000Z", "Review"),
+    ("Launch 14 March 2025", "20250314T090000Z", "20250314T100000Z", "Launch"),
+    ("Deploy 2025-03-14T15:00:30", "20250314T150030Z", "20250314T160030Z", "Deploy"),
+    ("Party 14/03/2025", "20250314T090000Z", "20250314T100000Z", "Party"),
+    ("Party 03/03/2025", "20250303T090000Z", "20250303T100000Z", "Party"),
+    ("Offsite 2025/03/14", "20250314T090000Z", "20250314T100000Z", "Offsite"),
+    ("Talk Mar 14th 2025", "20250314T090000Z", "20250314T100000Z", "Talk"),
+])
+def test_resolves_unambiguous_dates(text, start, end, summary):
+    result = parse_date_locally(text)
+    assert result == {"start_date": start, "end_date": end, "summary": summary, "has_valid_date": True}
+
+
+@pytest.mark.parametrize("text", [
+    # partially parsed schedules: the model has to read these
+    "2025-03-14 15:00Z",
+    "Lunch March 14, 2025 at noon",
+    "Call March 14, 2025 at 3",
+    "Dinner March 14, 2025 8 in the evening",
+    "Workshop March 14, 2025 3pm for 3 hours",
+    "Standup March 14, 2025 3pm CET",
+    "Release March 14, 2025 EOD",
+    "Sync March 14, 2025 at midnight",
+    # relative, ambiguous or several dates
+    "Meeting tomorrow at 2 PM",
+    "Lunch next friday",
+    "Due 03/04/2025",
+    "Trip March 14, 2025 to March 20, 2025",
+    "no date here",
+    "",
+])
+def test_falls_back_to_model(text):
+    assert parse_date_locally(text) is None
+
+
+def test_default_timezone_applies_to_times_without_zone():
+    result = parse_date_locally("Dentist on March 14, 2025 at 3:30 pm", "America/New_York")
+    assert result["start_date"] == "20250314T193000Z"
+
+
+def test_missing_zoneinfo_warns_and_uses_utc(monkeypatch):
+    from conversion import date_parse
+
+    warnings = []
+    monkeypatch.setattr(date_parse, "ZoneInfo", None)
+    monkeypatch.setattr(date_parse, "_warned_zoneinfo", False)
+    monkeypatch.setattr(date_parse.log, "warning", lambda msg, **fields: warnings.append(fields))
+
+    result = parse_date_locally("Dentist on March 14, 2025 at 3:30 pm", "America/New_York")
+    parse_date_locally("Dentist on March 14, 2025 at 3:30 pm", "America/New_York")
+
+    assert result["start_date"] == "20250314T153000Z"
+    assert warnings == [{"calendar_timezone": "America/New_York"}]
@@ -0,0 +1,102 @@
+import random
+import re
+
+import pytest
+
+from classification.classify import (
+    COUNTRY_INDICATORS, DATE_INDICATORS, DIRECTIONAL_INDICATORS, MATH_FUNCTIONS, MATH_KEYWORDS,
+    STREET_TYPES, UNIT_INDICATORS, URL_INDICATORS, classifier
+)
+from classification.keywords import KeywordAutomaton
+
+# the substring and \b checks the automaton replaced, per label
+BASELINE = {
+    'url_indicator': (URL_INDICATORS, False),
+    'date_indicator': (DATE_INDICATORS, False),
+    'math_word': (MATH_FUNCTIONS + MATH_KEYWORDS, False),
+    'street_word': (STREET_TYPES, True),
+    'street': (STREET_TYPES, False),
+    'direction': (DIRECTIONAL_INDICATORS, False),
+    'unit': (UNIT_INDICATORS, False),
+    'country': (COUNTRY_INDICATORS, False),
+}
+
+
+def baseline_labels(text: str) -> set:
+    text = text.lower()
+    found = set()
+    for label, (keywords, word_boundary) in BASELINE.items():
+        if word_boundary:
+            hit = any(re.search(r'\b' + re.escape(keyword) + r'\b', text) for keyword in keywords)
+        else:
+            hit = any(keyword in text for keyword in keywords)
+        if hit:
+            found.add(label)
+    return found
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "Meeting tomorrow at 3pm",
+    "123 Main St, Springfield",
+    "1600 Pennsylvania Avenue NW, Washington, DC 20500",
+    "https://example.com/path",
+    "visit www.example.org",
+    "sin(x)^2 + cos(x)^2 = 1",
+    "the derivative of the integral",
+    "Stanford, Apt 4B, USA",
+    "streetwise drive-through",
+    "st. st st_ _st st1",
+])
+def test_classifier_scan_matches_substring_checks(text):
+    assert classifier.scan_keywords(text) == baseline_labels(text)
+
+
+def test_random_texts_match_substring_checks():
+    rng = random.Random(1234)
+    words = [keyword for keywords, _ in BASELINE.values() for keyword in keywords]
+    words += ["the", "x", "42", "_", "-", ",", " ", ".", "a1", "street", "road"]
+    for _ in range(500):
+        text = "".join(rng.choice(words) + rng.choice(["", " ", "_", "1", ", "]) for _ in range(rng.randint(1, 8)))
+        assert classifier.scan_keywords(text) == baseline_labels(text), text
+
+
+def test_overlapping_keywords_use_failure_links():
+    automaton = KeywordAutomaton()
+    automaton.add("she", "she")
+    automaton.add("he", "he")
+    automaton.add("hers", "hers")
+    automaton.add("his", "his")
+    assert automaton.scan("ushers") == {"she", "he", "hers"}
+    assert automaton.scan("ahis") == {"his"}
+    assert automaton.scan("xyz") == set()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("st", True),
+    ("main st.", True),
+    ("first", False),
+    ("st_", False),
+    ("_st", False),
+    ("st1", False),
+    ("a-st-b", True),
+])
+def test_word_boundary_matches_regex(text, expected):
+    automaton = KeywordAutomaton()
+    automaton.add("st", "street", word_boundary=True)
+    assert ("street" in automaton.scan(text)) is expected
+    assert bool(re.search(r'\bst\b', text)) is expected
+
+
+def test_rejects_empty_keyword():
+    with pytest.raises(ValueError):
+        KeywordAutomaton().add("", "label")
+
+
+def test_adding_after_build_rebuilds():
+    automaton = KeywordAutomaton()
+    automaton.add("cat", "animal")
+    assert automaton.scan("a cat") == {"animal"}
+    automaton.add("dog", "pet")
+    assert automaton.scan("a dog and a cat") == {"animal", "pet"}
+    assert automaton.labels == {"animal", "pet"}
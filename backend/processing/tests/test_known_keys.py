@@ -0,0 +1,77 @@
+import threading
+
+import known_keys
+from known_keys import BloomFilter, KnownKeys
+
+
+def test_bloom_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "keys.bloom")
+    bloom = BloomFilter(capacity=1000)
+    for n in range(200):
+        bloom.add(f"json/{n}.json")
+    bloom.save(path)
+
+    loaded = BloomFilter(capacity=1000)
+    assert loaded.load(path)
+    assert all(f"json/{n}.json" in loaded for n in range(200))
+    assert loaded.bits == bloom.bits
+
+
+def test_bloom_load_rejects_missing_or_resized_files(tmp_path):
+    path = str(tmp_path / "keys.bloom")
+    assert not BloomFilter(capacity=1000).load(path)
+    BloomFilter(capacity=1000).save(path)
+    assert not BloomFilter(capacity=5000).load(path)
+
+
+def test_known_keys_saves_every_n_additions_and_on_close(tmp_path):
+    path = str(tmp_path / "keys.bloom")
+    keys = KnownKeys(path, capacity=1000, save_every=10)
+    for n in range(10):
+        keys.add(f"k{n}")
+    assert "k9" in KnownKeys(path, capacity=1000).bloom
+    keys.add("late")
+    assert "late" not in KnownKeys(path, capacity=1000).bloom
+    keys.close()
+    assert "late" in KnownKeys(path, capacity=1000).bloom
+
+
+def test_restarted_index_confirms_bloom_hits(tmp_path):
+    path = str(tmp_path / "keys.bloom")
+    keys = KnownKeys(path, capacity=1000)
+    keys.add("stored")
+    keys.close()
+
+    restarted = KnownKeys(path, capacity=1000)
+    assert not restarted.known_locally("stored")
+    assert restarted.contains("stored", confirm=lambda key: True)
+    assert restarted.known_locally("stored")
+    assert not restarted.contains("missing", confirm=lambda key: False)
+    assert restarted.stats()["bloom_hits"] == 1
+
+
+def test_file_is_written_outside_the_index_lock(tmp_path, monkeypatch):
+    path = str(tmp_path / "keys.bloom")
+    keys = KnownKeys(path, capacity=1000, save_every=1)
+    lookups = []
+    original_save = BloomFilter.save
+
+    def save(bloom, save_path, data=None):
+        # another thread can still query the index while the file is written
+        thread = threading.Thread(target=lambda: lookups.append(keys.known_locally("a")))
+        thread.start()
+        thread.join(1)
+        original_save(bloom, save_path, data)
+
+    monkeypatch.setattr(known_keys.BloomFilter, "save", save)
+    keys.add("a")
+    assert lookups == [True]
+
+
+def test_failed_save_keeps_additions_pending(tmp_path):
+    path = str(tmp_path / "missing-dir" / "keys.bloom")
+    keys = KnownKeys(path, capacity=1000, save_every=1)
+    keys.add("a")
+    (tmp_path / "missing-dir").mkdir()
+    keys.close()
+    assert "a" in KnownKeys(path, capacity=1000).bloom
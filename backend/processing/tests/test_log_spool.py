@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+
+bson = pytest.importorskip("bson")
+
+from db_storage import LogSpool
+
+
+def make_entry(n):
+    return {"_id": bson.ObjectId(), "timestamp": datetime(2024, 5, 1, 12, 0, n), "endpoint": "/process", "n": n}
+
+
+def test_append_and_read_back_round_trips(tmp_path):
+    spool = LogSpool(str(tmp_path / "logs.jsonl"))
+    entries = [make_entry(n) for n in range(5)]
+    spool.append(entries)
+    path = spool.take()
+    batches = list(spool.read_batches(path, batch_size=2))
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    replayed = [entry for batch in batches for entry in batch]
+    assert [str(entry["_id"]) for entry in replayed] == [str(entry["_id"]) for entry in entries]
+    assert replayed[3]["timestamp"] == entries[3]["timestamp"]
+    assert spool.spooled == 5
+
+
+def test_take_moves_the_file_aside_while_new_entries_append(tmp_path):
+    spool = LogSpool(str(tmp_path / "logs.jsonl"))
+    assert spool.take() is None
+    spool.append([make_entry(0)])
+    path = spool.take()
+    assert path == spool.replay_path
+    spool.append([make_entry(1), make_entry(2)])
+    assert [entry["n"] for batch in spool.read_batches(path, 10) for entry in batch] == [0]
+    # an unfinished replay is handed out again before the newer file
+    assert spool.take() == path
+    spool.done(path)
+    path = spool.take()
+    assert [entry["n"] for batch in spool.read_batches(path, 10) for entry in batch] == [1, 2]
+    spool.done(path)
+    assert spool.take() is None
+    assert spool.pending_bytes() == 0
+
+
+def test_unreadable_lines_are_skipped(tmp_path):
+    spool = LogSpool(str(tmp_path / "logs.jsonl"))
+    spool.append([make_entry(0)])
+    with open(spool.path, "a", encoding="utf-8") as f:
+        f.write("not json\n\n")
+    spool.append([make_entry(1)])
+    path = spool.take()
+    assert [entry["n"] for batch in spool.read_batches(path, 10) for entry in batch] == [0, 1]
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from model_calls import ModelCallExecutor, ModelCallTimeout
+
+
+def test_returns_results_and_counts_them():
+    executor = ModelCallExecutor(max_concurrency=2, timeout=5)
+    try:
+        assert asyncio.run(executor.run(lambda a, b: a + b, 1, 2)) == 3
+        assert executor.stats()["completed"] == 1
+    finally:
+        executor.shutdown()
+
+
+def test_errors_propagate_and_count_as_failed():
+    def fail():
+        raise ValueError("bad response")
+
+    executor = ModelCallExecutor(max_concurrency=1, timeout=5)
+    try:
+        with pytest.raises(ValueError):
+            asyncio.run(executor.run(fail))
+        assert executor.stats()["failed"] == 1
+    finally:
+        executor.shutdown()
+
+
+def test_concurrency_limit_bounds_running_calls():
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def call():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return True
+
+    async def scenario(executor):
+        return await asyncio.gather(*(executor.run(call) for _ in range(8)))
+
+    executor = ModelCallExecutor(max_concurrency=2, timeout=5)
+    try:
+        assert asyncio.run(scenario(executor)) == [True] * 8
+    finally:
+        executor.shutdown()
+    assert peak[0] == 2
+
+
+def test_timeout_counts_from_when_the_call_starts():
+    # the second call waits ~0.1s for the slot, longer than half its timeout
+    async def scenario(executor):
+        return await asyncio.gather(*(executor.run(time.sleep, 0.1) for _ in range(2)))
+
+    executor = ModelCallExecutor(max_concurrency=1, timeout=0.15)
+    try:
+        asyncio.run(scenario(executor))
+        assert executor.stats()["timeouts"] == 0
+    finally:
+        executor.shutdown()
+
+
+def test_timed_out_call_keeps_its_slot_until_the_thread_returns():
+    spans = []
+
+    def call(duration):
+        started = time.monotonic()
+        time.sleep(duration)
+        spans.append((started, time.monotonic()))
+        return duration
+
+    async def scenario(executor):
+        with pytest.raises(ModelCallTimeout):
+            await executor.run(call, 0.2, timeout=0.02)
+        assert executor.stats()["in_flight"] == 1
+        return await executor.run(call, 0)
+
+    executor = ModelCallExecutor(max_concurrency=1, timeout=5)
+    try:
+        assert asyncio.run(scenario(executor)) == 0
+    finally:
+        executor.shutdown()
+    (first_start, first_end), (second_start, _) = spans
+    assert second_start >= first_end
+    assert executor.stats()["timeouts"] == 1
+    assert executor.stats()["in_flight"] == 0
@@ -0,0 +1,48 @@
+import io
+import random
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from conversion.preprocess import preprocess_image
+
+
+def bordered_screenshot() -> bytes:
+    """400x300 RGBA: transparent border around a 200x100 block of noise"""
+    rng = random.Random(7)
+    image = Image.new("RGBA", (400, 300), (0, 0, 0, 0))
+    block = Image.new("RGBA", (200, 100))
+    block.putdata([(rng.randrange(256), rng.randrange(256), rng.randrange(256), 255) for _ in range(200 * 100)])
+    image.paste(block, (100, 100))
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+def test_trims_grayscales_and_downscales():
+    original = bordered_screenshot()
+    processed, stats = preprocess_image(original, max_dimension=100, padding=8)
+
+    image = Image.open(io.BytesIO(processed))
+    assert image.mode == "L"
+    # trimmed to the block plus padding (216x116), then scaled to fit 100 px
+    assert image.width == 100
+    assert 53 <= image.height <= 54
+    assert stats["size_before"] == [400, 300]
+    assert stats["size_after"] == list(image.size)
+    assert stats["bytes_before"] == len(original)
+    assert stats["bytes_after"] == len(processed) < len(original)
+    assert not stats["used_original"]
+
+
+def test_keeps_the_original_when_processing_does_not_shrink_it():
+    image = Image.new("L", (4, 4), 255)
+    output = io.BytesIO()
+    image.save(output, format="PNG", optimize=True)
+    original = output.getvalue()
+
+    processed, stats = preprocess_image(original, trim=False)
+    assert processed == original
+    assert stats["used_original"]
+    assert stats["size_after"] == stats["size_before"] == [4, 4]
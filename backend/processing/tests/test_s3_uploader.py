@@ -0,0 +1,110 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import s3_uploader
+from s3_uploader import BackgroundUploader
+
+
+class FakeStorage:
+    """records upload_json_output calls; fails the first `failures` of them"""
+
+    bucket_name = "bucket"
+
+    def __init__(self, failures: int = 0, gate: threading.Event = None):
+        self.failures = failures
+        self.gate = gate
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def public_url(self, file_key):
+        return f"https://bucket.s3.amazonaws.com/{file_key}"
+
+    def is_known(self, file_key):
+        return False
+
+    def upload_json_output(self, output_data, metadata=None, file_key=None):
+        if self.gate is not None:
+            self.gate.wait(5)
+        with self.lock:
+            self.calls.append(file_key)
+            if self.failures:
+                self.failures -= 1
+                return {"success": False, "error": "slow down"}
+        return {"success": True, "s3_key": file_key, "url": self.public_url(file_key)}
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_submit_returns_pending_and_worker_uploads():
+    storage = FakeStorage()
+    uploader = BackgroundUploader(storage, workers=1)
+    result = uploader.submit("upload_json_output", "json/a.json", {"x": 1})
+    assert result["status"] == "pending"
+    assert result["url"] == storage.public_url("json/a.json")
+    wait_for(lambda: uploader.status("json/a.json")["status"] == "uploaded")
+    uploader.shutdown()
+    assert uploader.stats()["uploaded"] == 1
+
+
+def test_failed_uploads_retry_with_exponential_backoff(monkeypatch):
+    sleeps = []
+    # replace the module's time, not time.sleep itself, which wait_for uses
+    monkeypatch.setattr(s3_uploader, "time", SimpleNamespace(sleep=sleeps.append, monotonic=time.monotonic))
+    storage = FakeStorage(failures=2)
+    uploader = BackgroundUploader(storage, workers=1, max_retries=3, backoff=0.5)
+    uploader.submit("upload_json_output", "json/a.json", {})
+    wait_for(lambda: uploader.status("json/a.json")["status"] == "uploaded")
+    uploader.shutdown()
+    assert sleeps == [0.5, 1.0]
+    assert len(storage.calls) == 3
+    assert uploader.stats()["retries"] == 2
+
+
+def test_gives_up_after_max_retries_and_reports_failure(monkeypatch):
+    monkeypatch.setattr(s3_uploader, "time", SimpleNamespace(sleep=lambda seconds: None, monotonic=time.monotonic))
+    failures = []
+    uploader = BackgroundUploader(FakeStorage(failures=10), workers=1, max_retries=2)
+    uploader.submit("upload_json_output", "json/a.json", {}, on_failure=failures.append)
+    wait_for(lambda: uploader.status("json/a.json")["status"] == "failed")
+    uploader.shutdown()
+    assert [failure["s3_key"] for failure in failures] == ["json/a.json"]
+    assert uploader.stats()["failed"] == 1
+
+
+def test_full_queue_drops_the_job_and_calls_on_failure():
+    gate = threading.Event()
+    storage = FakeStorage(gate=gate)
+    uploader = BackgroundUploader(storage, max_queue=1, workers=1)
+    failures = []
+    uploader.submit("upload_json_output", "json/running.json", {})
+    wait_for(lambda: uploader.stats()["queued"] == 0)
+    uploader.submit("upload_json_output", "json/queued.json", {})
+    result = uploader.submit("upload_json_output", "json/dropped.json", {}, on_failure=failures.append)
+
+    assert result["status"] == "dropped" and not result["success"]
+    assert failures == [result]
+    assert uploader.status("json/dropped.json")["status"] == "dropped"
+    assert uploader.stats()["dropped"] == 1
+    gate.set()
+    uploader.shutdown()
+    assert "json/dropped.json" not in storage.calls
+
+
+def test_shutdown_drains_queued_jobs():
+    gate = threading.Event()
+    storage = FakeStorage(gate=gate)
+    uploader = BackgroundUploader(storage, max_queue=100, workers=2)
+    keys = [f"json/{n}.json" for n in range(20)]
+    for key in keys:
+        uploader.submit("upload_json_output", key, {})
+    gate.set()
+    uploader.shutdown(timeout=5)
+    assert sorted(storage.calls) == sorted(keys)
+    assert uploader.stats()["queued"] == 0
+    assert all(uploader.status(key)["status"] == "uploaded" for key in keys)
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from model_calls import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flight = SingleFlight()
+        started = []
+
+        async def call():
+            started.append(1)
+            await asyncio.sleep(0.01)
+            return "latex"
+
+        results = await asyncio.gather(*(flight.do("key", call) for _ in range(5)))
+        return flight, started, results
+
+    flight, started, results = asyncio.run(scenario())
+    assert results == ["latex"] * 5
+    assert len(started) == 1
+    assert flight.stats() == {"calls": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def call(value):
+            await asyncio.sleep(0)
+            return value
+
+        return await asyncio.gather(flight.do("a", lambda: call(1)), flight.do("b", lambda: call(2))), flight
+
+    results, flight = asyncio.run(scenario())
+    assert results == [1, 2]
+    assert flight.calls == 2 and flight.coalesced == 0
+
+
+def test_errors_are_shared_and_not_kept():
+    async def scenario():
+        flight = SingleFlight()
+        attempts = []
+
+        async def failing():
+            attempts.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("model down")
+
+        results = await asyncio.gather(*(flight.do("key", failing) for _ in range(3)), return_exceptions=True)
+
+        async def working():
+            return "ok"
+
+        # the failure is not cached: the next caller starts a fresh call
+        retry = await flight.do("key", working)
+        return results, attempts, retry
+
+    results, attempts, retry = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(attempts) == 1
+    assert retry == "ok"
+
+
+def test_cancelled_caller_does_not_cancel_the_call_for_others():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("key", call))
+        second = asyncio.ensure_future(flight.do("key", call))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second, flight.stats()
+
+    result, stats = asyncio.run(scenario())
+    assert result == "done"
+    assert stats == {"calls": 1, "coalesced": 1, "in_flight": 0}
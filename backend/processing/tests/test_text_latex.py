@@ -0,0 +1,58 @@
+import pytest
+
+from conversion.text_latex import text_to_latex
+
+
+@pytest.mark.parametrize("text, latex", [
+    ("x^2 + 3x - 1 = 0", "x^{2} + 3x - 1 = 0"),
+    ("sqrt(a)/b", r"\frac{\sqrt{a}}{b}"),
+    ("1/2 + 1/3", r"\frac{1}{2} + \frac{1}{3}"),
+    ("2x-1", "2x - 1"),
+    ("x/2", r"\frac{x}{2}"),
+    ("sin(x)/x", r"\frac{\sin\left(x\right)}{x}"),
+    ("sin x", r"\sin x"),
+    ("2(x+1)", r"2\left(x + 1\right)"),
+    ("(x+1)(x-1)", r"\left(x + 1\right)\left(x - 1\right)"),
+    ("a_i^2", "a_{i}^{2}"),
+    ("2^3^2", "2^{3^{2}}"),
+    ("|x| <= 3", r"\left|x\right| \leq 3"),
+    ("e^(i*pi) + 1 = 0", r"e^{i \cdot \pi} + 1 = 0"),
+    ("max(a, b)", r"\max\left(a, b\right)"),
+    ("π/2", r"\frac{\pi}{2}"),
+    ("n!", "n!"),
+    ("f'(x) = 2x", r"f'\left(x\right) = 2x"),
+    ("x-y", "x - y"),
+    ("10 - 5", "10 - 5"),
+    ("2-1", "2 - 1"),
+    ("3/4", r"\frac{3}{4}"),
+    ("a/b/c", r"\frac{\frac{a}{b}}{c}"),
+    ("1.5e-10", r"1.5\times10^{-10}"),
+    ("6.02E+23", r"6.02\times10^{23}"),
+    ("1,000,000", "1{,}000{,}000"),
+    ("f(1, 2)", r"f\left(1, 2\right)"),
+])
+def test_converts_typed_math(text, latex):
+    assert text_to_latex(text) == latex
+
+
+@pytest.mark.parametrize("text", [
+    # dates, phone numbers, ranges and abbreviations the classifier also calls math
+    "12/25/2025",
+    "2025-03-14",
+    "(555) 123-4567",
+    "+1 555-123-4567",
+    "I/O",
+    "10-15 min",
+    "555-1234",
+    # prose and malformed input
+    "Solve for x when it rains",
+    "(x + 1",
+    "x + 1)",
+    "sqrt",
+    "1+",
+    "x = 2 *",
+    "",
+    "x" * 501,
+])
+def test_rejects_non_math(text):
+    assert text_to_latex(text) is None